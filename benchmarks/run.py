@@ -0,0 +1,177 @@
+"""Benchmarks every registered environment and writes the results as JSON.
+
+Usage:
+    python benchmarks/run.py [--envs ID ...] [--output results.json]
+    python benchmarks/run.py --compare baseline.json [--tolerance 0.25]
+
+Measured for each environment:
+    - construction: __init__ time, including the reachability search and encoders
+    - compile_model: time to build the full transition model from `model()`
+    - step/reset: throughput in calls per second, with uniform random actions
+    - value_iteration/policy_iteration: wall time and number of sweeps (or
+      improvement steps) on the compiled model
+
+Construction and compilation are timed with the process-wide shared structures cleared
+beforehand, so they reflect a cold start. Every timing is the minimum over `--repeats`
+runs. With --compare, the new results are checked against a previous results file and
+the script exits with status 1 if any time grew (or throughput fell) by more than the
+given tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# Allow running from a source checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gym_classics
+from gym_classics.dynamic_programming import policy_iteration_steps, value_iteration_sweeps
+
+
+SCHEMA_VERSION = 1
+
+# Metrics where higher is better; for all others, lower is better
+THROUGHPUT_METRICS = {'steps_per_sec', 'resets_per_sec'}
+
+
+def benchmark_env(env_id, n_steps, repeats, discount, precision):
+    # The environment modules can only be imported once a backend is registered
+    from gym_classics.envs.abstract.base_env import BaseEnv
+    results = {}
+
+    def cold_env():
+        BaseEnv.clear_shared_structures()
+        return gym_classics.make_unwrapped(env_id)
+
+    gym_classics.make_unwrapped(env_id)  # Import the module outside of the timings
+    results['construction_sec'] = _best_of(repeats, cold_env)
+
+    def compile_time():
+        env = cold_env()
+        start = time.perf_counter()
+        env.compile_model()
+        return time.perf_counter() - start
+    results['compile_model_sec'] = min(compile_time() for _ in range(repeats))
+
+    env = gym_classics.make_unwrapped(env_id)
+    model = env.compile_model()
+    results['n_states'] = model.n_states
+    results['n_actions'] = model.n_actions
+    results['n_outcomes'] = model.n_outcomes
+
+    env.reset(seed=0)
+    actions = np.random.default_rng(0).integers(model.n_actions, size=n_steps).tolist()
+
+    def run_steps():
+        for action in actions:
+            _, _, terminated, _, _ = env.step(action)
+            if terminated:
+                env.reset()
+    results['steps_per_sec'] = n_steps / _best_of(repeats, run_steps)
+
+    def run_resets():
+        for _ in range(n_steps):
+            env.reset()
+    results['resets_per_sec'] = n_steps / _best_of(repeats, run_resets)
+
+    # Undiscounted problems may have no solution, so use the same discount for all
+    for name, solver in [('value_iteration', value_iteration_sweeps),
+                         ('policy_iteration', policy_iteration_steps)]:
+        def solve():
+            for stats in solver(env, discount, precision):
+                pass
+            return stats
+        results[name + '_sec'] = _best_of(repeats, solve)
+        results[name + '_iterations'] = solve().iteration
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of human-readable regressions of `results` relative to `baseline`."""
+    regressions = []
+    for env_id, metrics in results['envs'].items():
+        old_metrics = baseline['envs'].get(env_id, {})
+        for name, value in metrics.items():
+            old = old_metrics.get(name)
+            if not old or not (name.endswith('_sec') or name in THROUGHPUT_METRICS):
+                continue
+            if name in THROUGHPUT_METRICS:
+                ratio = old / value
+            else:
+                ratio = value / old
+            if ratio > 1.0 + tolerance:
+                regressions.append("{} {}: {:.4g} -> {:.4g} ({:+.0%})".format(
+                    env_id, name, old, value, ratio - 1.0))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--envs', nargs='+', default=[e['id'] for e in gym_classics._registry],
+                        help="environment ids to benchmark (default: all registered)")
+    parser.add_argument('--steps', type=int, default=20000,
+                        help="number of step/reset calls per throughput measurement")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--discount', type=float, default=0.9)
+    parser.add_argument('--precision', type=float, default=1e-6)
+    parser.add_argument('--backend', default='gym', choices=['gym', 'gymnasium'])
+    parser.add_argument('--output', default=None,
+                        help="write the JSON results here (default: stdout)")
+    parser.add_argument('--compare', default=None, metavar='BASELINE',
+                        help="a previous results file to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown before reporting a regression")
+    args = parser.parse_args()
+
+    gym_classics.register(args.backend)
+    results = {
+        'schema_version': SCHEMA_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'settings': {'steps': args.steps, 'repeats': args.repeats,
+                     'discount': args.discount, 'precision': args.precision},
+        'envs': {},
+    }
+    for env_id in args.envs:
+        results['envs'][env_id] = benchmark_env(env_id, args.steps, args.repeats,
+                                                args.discount, args.precision)
+        print("finished {}".format(env_id), file=sys.stderr)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION: " + line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def _best_of(repeats, fn):
+    """Returns the shortest wall time of `repeats` calls to `fn`."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+from importlib import import_module
 import warnings
 
 
@@ -88,3 +89,34 @@ def register(backend='gym'):
 
     for kwargs in _registry:
         register(**kwargs)
+
+
+def make_unwrapped(env_id, **kwargs):
+    """Instantiates a registered environment directly from its entry point, without the
+    wrappers added by `gym.make`. This is useful in worker processes and batch tools.
+    `register()` must have been called first. The registered spec (including the time
+    limit) is attached to the environment like `gym.make` does."""
+    assert _backend is not None, "call gym_classics.register() first"
+    module, name = _registry_entry(env_id)['entry_point'].split(':')
+    env = getattr(import_module(module), name)(**kwargs)
+    env.spec = import_module(_backend).spec(env_id)
+    return env
+
+
+def max_episode_steps(env_id):
+    """Returns the time limit of a registered environment, or None if it has none."""
+    return _registry_entry(env_id).get('max_episode_steps')
+
+
+def _init_worker(backend):
+    """Process pool initializer: registers the environments in a fresh worker process
+    (forked workers have already inherited the registration)."""
+    if _backend is None:
+        register(backend)
+
+
+def _registry_entry(env_id):
+    for entry in _registry:
+        if entry['id'] == env_id:
+            return entry
+    raise KeyError("unknown environment id '{}'".format(env_id))
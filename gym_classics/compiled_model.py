@@ -0,0 +1,245 @@
+import numpy as np
+
+
+class Dynamics:
+    """The reward-free part of an environment's transition model, stored as dense NumPy
+    arrays: next states, dones, and probabilities.
+
+    Transitions are kept in padded arrays of shape (S, A, K), where K is the largest
+    number of possible outcomes from any state-action pair. Unused slots point back to
+    the originating state and have zero probability, so they never contribute to an
+    expectation and are never sampled.
+
+    Environments that differ only in their reward functions can share one instance.
+    """
+
+    def __init__(self, next_states, dones, probs):
+        assert next_states.shape == dones.shape == probs.shape
+        assert next_states.ndim == 3
+        self.next_states = next_states
+        self.dones = dones
+        self.probs = probs
+
+        # Cumulative probabilities for inverse-transform sampling. We renormalize each
+        # row and force every slot at or after the last outcome to exactly 1, so that
+        # rounding error can never select a padded slot.
+        cdf = np.cumsum(probs, axis=-1)
+        cdf /= cdf[..., -1:]
+        self._n_valid = np.count_nonzero(probs, axis=-1)
+        cdf[np.arange(self.n_outcomes) >= (self._n_valid[..., None] - 1)] = 1.0
+        self._cdf = cdf
+
+        # Probability of each outcome that continues the episode (i.e. bootstraps)
+        self._continue_probs = probs * (1.0 - dones)
+        self._continue_matrix = None
+        # Total probability of continuing from each state-action pair, shape (S, A)
+        self.continue_mass = self._continue_probs.sum(axis=-1)
+        # True if any state-action pair can terminate the episode
+        self.terminates = bool(np.any(probs * dones > 0.0))
+
+    @property
+    def n_states(self):
+        return self.next_states.shape[0]
+
+    @property
+    def n_actions(self):
+        return self.next_states.shape[1]
+
+    @property
+    def n_outcomes(self):
+        return self.next_states.shape[2]
+
+    def save(self, path):
+        """Saves the arrays to an uncompressed .npz file."""
+        np.savez(path, next_states=self.next_states, dones=self.dones, probs=self.probs)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['next_states'], data['dones'], data['probs'])
+
+    def expected_next_values(self, V):
+        """Returns E[(1 - done) * V(S')] for every state-action pair.
+
+        `V` may be a single value function of shape (S,) or a stack of them with shape
+        (N, S); the result has shape (S, A) or (N, S, A), respectively.
+        """
+        S, A = self.n_states, self.n_actions
+        if self._use_dense_matrix():
+            M = self._dense_continue_matrix()
+            return (V @ M.T).reshape(V.shape[:-1] + (S, A))
+        return np.sum(self._continue_probs * V[..., self.next_states], axis=-1)
+
+    def _use_dense_matrix(self):
+        # When outcomes cover a large part of the state space (e.g. Jack's Car Rental),
+        # a dense matrix product is faster than gathering
+        return 4 * self.n_outcomes >= self.n_states
+
+    def _dense_continue_matrix(self):
+        if self._continue_matrix is None:
+            S, A, K = self.next_states.shape
+            M = np.zeros((S * A, S))
+            rows = np.repeat(np.arange(S * A), K)
+            np.add.at(M, (rows, self.next_states.ravel()), self._continue_probs.ravel())
+            self._continue_matrix = M
+        return self._continue_matrix
+
+    def restrict(self, pairs):
+        """Returns an operator that evaluates `expected_next_values` only at the given
+        state-action pairs, specified as flat indices s * A + a. The cost per evaluation
+        is proportional to the number of pairs."""
+        return RestrictedDynamics(self, pairs)
+
+    def freeze(self):
+        """Precomputes everything that is otherwise built lazily and makes all arrays
+        read-only. Afterwards, the dynamics can safely be queried from many threads."""
+        if self._use_dense_matrix():
+            self._dense_continue_matrix()
+        for array in [self.next_states, self.dones, self.probs, self._cdf, self._n_valid,
+                      self._continue_probs, self._continue_matrix, self.continue_mass]:
+            if array is not None:
+                array.flags.writeable = False
+
+    def sample_outcomes(self, states, actions, rng):
+        """Draws one outcome slot k for each of the given (encoded) state-action pairs."""
+        u = rng.random(states.shape)
+        if self.n_outcomes <= 32:
+            cdf = self._cdf[states, actions]
+            return np.count_nonzero(cdf < u[..., None], axis=-1)
+
+        # With many outcomes, a vectorized binary search for the first slot with
+        # cdf >= u avoids gathering the whole rows
+        cdf = self._cdf.reshape(-1)
+        offsets = (states * self.n_actions + actions) * self.n_outcomes
+        low = np.zeros(states.shape, dtype=np.int64)
+        high = np.full(states.shape, self.n_outcomes - 1)
+        while True:
+            searching = low < high
+            if not searching.any():
+                return low
+            mid = (low + high) // 2
+            below = cdf[offsets + mid] < u
+            low = np.where(searching & below, mid + 1, low)
+            high = np.where(searching & ~below, mid, high)
+
+    def outcome_index(self, state, action, next_state):
+        """Returns the slot k that holds the given (encoded) next state."""
+        n = self._n_valid[state, action]
+        return np.searchsorted(self.next_states[state, action, :n], next_state)
+
+
+class RestrictedDynamics:
+    """Dynamics restricted to a subset of state-action pairs (see `Dynamics.restrict`)."""
+
+    def __init__(self, dynamics, pairs):
+        self.pairs = pairs
+        if dynamics._use_dense_matrix():
+            self._matrix = dynamics._dense_continue_matrix()[pairs]
+        else:
+            self._matrix = None
+            self._next_states = dynamics.next_states.reshape(-1, dynamics.n_outcomes)[pairs]
+            self._continue_probs = dynamics._continue_probs.reshape(-1, dynamics.n_outcomes)[pairs]
+
+    def expected_next_values(self, V):
+        """Returns E[(1 - done) * V(S')] for each pair, with shape (len(pairs),)."""
+        if self._matrix is not None:
+            return self._matrix @ V
+        return np.sum(self._continue_probs * V[self._next_states], axis=-1)
+
+
+class CompiledModel:
+    """The full transition model of an environment: shared `Dynamics` plus a reward
+    array with the same (S, A, K) layout."""
+
+    def __init__(self, dynamics, rewards):
+        assert rewards.shape == dynamics.next_states.shape
+        self.dynamics = dynamics
+        self.rewards = rewards
+
+    @classmethod
+    def from_env(cls, env):
+        """Compiles the model by querying `env.model` at every state-action pair."""
+        S = env.observation_space.n
+        A = env.action_space.n
+        transitions = [[env.model(s, a) for a in range(A)] for s in range(S)]
+        K = max(len(t[0]) for row in transitions for t in row)
+
+        next_states = np.repeat(np.arange(S), A * K).reshape(S, A, K)
+        rewards = np.zeros((S, A, K))
+        dones = np.zeros((S, A, K))
+        probs = np.zeros((S, A, K))
+
+        for s, row in enumerate(transitions):
+            for a, (ns, r, d, p) in enumerate(row):
+                k = len(ns)
+                next_states[s, a, :k] = ns
+                rewards[s, a, :k] = r
+                dones[s, a, :k] = d
+                probs[s, a, :k] = p
+
+        return cls(Dynamics(next_states, dones, probs), rewards)
+
+    def with_rewards(self, rewards):
+        """Returns a new model that shares these dynamics but uses different rewards."""
+        return CompiledModel(self.dynamics, rewards)
+
+    @property
+    def next_states(self):
+        return self.dynamics.next_states
+
+    @property
+    def dones(self):
+        return self.dynamics.dones
+
+    @property
+    def probs(self):
+        return self.dynamics.probs
+
+    @property
+    def n_states(self):
+        return self.dynamics.n_states
+
+    @property
+    def n_actions(self):
+        return self.dynamics.n_actions
+
+    @property
+    def n_outcomes(self):
+        return self.dynamics.n_outcomes
+
+    def freeze(self):
+        """Makes the model read-only and safe to query from many threads."""
+        self.dynamics.freeze()
+        self.rewards.flags.writeable = False
+
+    def transitions(self, state, action):
+        """Returns the transitions from the given (encoded) state-action pair in the same
+        format as `BaseEnv.model`, as views into the compiled arrays."""
+        n = self.dynamics._n_valid[state, action]
+        return (self.next_states[state, action, :n], self.rewards[state, action, :n],
+                self.dones[state, action, :n], self.probs[state, action, :n])
+
+    def expected_rewards(self, rewards=None):
+        """Returns the expected reward of every state-action pair, with shape (..., S, A).
+
+        An alternative reward array (or a stack of them) with trailing shape (S, A, K)
+        can be given in place of the compiled rewards.
+        """
+        if rewards is None:
+            rewards = self.rewards
+        return np.sum(self.probs * rewards, axis=-1)
+
+    def expected_next_values(self, V):
+        return self.dynamics.expected_next_values(V)
+
+    def sample(self, states, actions, rng):
+        """Draws one outcome for each of the given (encoded) state-action pairs.
+
+        Returns arrays of next states, rewards, and dones with the broadcast shape of
+        `states` and `actions`.
+        """
+        states, actions = np.broadcast_arrays(np.asarray(states), np.asarray(actions))
+        k = self.dynamics.sample_outcomes(states, actions, rng)
+        return (self.next_states[states, actions, k],
+                self.rewards[states, actions, k],
+                self.dones[states, actions, k])
@@ -1,52 +1,292 @@
-import argparse
+from collections import namedtuple
+import itertools
+import time
 
-import gym
 import numpy as np
 
+from gym_classics.utils import time_limit
 
-def value_iteration(env, discount, precision=1e-3):
-    assert 0.0 <= discount <= 1.0
+
+# All solvers below operate on the environment's compiled model and perform full
+# (synchronous) sweeps over the state space with NumPy.
+#
+# Several variants of the same environment can be solved together in one batched sweep.
+# `discount` may be a scalar or an array of discount factors, and `rewards` may be an
+# alternative reward array with shape (S, A, K) matching the compiled model -- or a
+# stack of them with shape (..., S, A, K). The batch shapes of the discounts and rewards
+# are broadcast against each other like NumPy arrays, and the results gain the same
+# leading batch dimensions: e.g. 20 discounts and 2 reward arrays given with shapes
+# (20, 1) and (1, 2, S, A, K) yield values with shape (20, 2, S). Each variant stops
+# being updated as soon as it converges.
+#
+# Every solver also has an "anytime" generator version (e.g. `value_iteration_sweeps`)
+# that yields a SweepStats record after each iteration, and stops once all variants have
+# converged. The caller may stop early at any point and use the current estimates. The
+# regular solvers accept a `callback`, which receives the same records and can stop the
+# solver by returning True, and a `time_budget` in seconds.
+#
+# See parallel.py for process-parallel versions of these solvers for large environments.
+
+
+SweepStats = namedtuple('SweepStats', [
+    'iteration',       # Number of completed iterations (sweeps or improvement steps)
+    'values',          # Current value estimates (a copy)
+    'policy',          # Current greedy/improved policy (a copy), or None
+    'residual',        # Bellman residual: max |V_new - V_old| per variant
+    'span',            # Span seminorm: max(V_new - V_old) - min(V_new - V_old) per variant
+    'policy_changes',  # Number of states whose action changed per variant, or None
+    'backups',         # Total state-action backups performed so far
+    'elapsed',         # Wall-clock seconds since the solver started
+    'gain',            # Estimated average reward per step (average-reward solvers only)
+], defaults=[None])
+
+
+def value_iteration(env, discount, precision=1e-3, rewards=None, callback=None,
+                    time_budget=None, stopping='residual', action_elimination=False):
+    sweeps = value_iteration_sweeps(env, discount, precision, rewards, stopping,
+                                    action_elimination)
+    return _run(sweeps, callback, time_budget).values
+
+
+def policy_iteration(env, discount, precision=1e-3, rewards=None, callback=None,
+                     time_budget=None):
+    steps = policy_iteration_steps(env, discount, precision, rewards)
+    return _run(steps, callback, time_budget).policy
+
+
+def policy_evaluation(env, discount, policy, precision=1e-3, rewards=None, callback=None,
+                      time_budget=None):
+    sweeps = policy_evaluation_sweeps(env, discount, policy, precision, rewards)
+    return _run(sweeps, callback, time_budget).values
+
+
+def value_iteration_sweeps(env, discount, precision=1e-3, rewards=None,
+                           stopping='residual', action_elimination=False):
+    """Value iteration with two optional accelerations for discount < 1, both based on
+    MacQueen's bounds on V* - V computed from the last change in values:
+
+        - stopping='span' stops once the bounds are within 2 * precision of each other
+          and returns their midpoint, which is then within `precision` of V*. The
+          default, stopping='residual', stops once max |V_new - V_old| <= precision.
+
+        - action_elimination=True permanently drops state-action pairs whose upper bound
+          on Q* falls below the best lower bound in that state, so later sweeps only
+          back up the remaining pairs.
+    """
     assert precision > 0.0
-    V = np.zeros(env.observation_space.n, dtype=np.float64)
+    assert stopping in {'residual', 'span'}
+    model, discounts, R, batch_shape = _prepare_variants(env, discount, rewards)
+    use_bounds = (stopping == 'span') or action_elimination
+    if use_bounds:
+        assert (discounts < 1.0).all(), \
+            "span stopping and action elimination require discount < 1"
+    N, S, A = R.shape
+    V = np.zeros((N, S), dtype=np.float64)
+    policy = np.zeros((N, S), dtype=np.int64)
+    residual, span, changes = np.zeros(N), np.zeros(N), np.zeros(N, dtype=np.int64)
 
-    while True:
-        V_old = V.copy()
+    # Bounds on V* - V, and the offset added to the reported values
+    lower, upper = np.full(N, -np.inf), np.full(N, np.inf)
+    offset = np.zeros(N)
+    if action_elimination:
+        # Restricted dynamics per variant, built once its first pair is eliminated
+        restricted = [None] * N
 
-        for s in env.states():
-            Q_values = [backup(env, discount, V, s, a) for a in env.actions()]
-            V[s] = max(Q_values)
+    start = time.perf_counter()
+    backups = 0
+    active = np.arange(N)
+    for i in itertools.count(1):
+        if action_elimination:
+            Q = np.empty((active.size, S, A))
+            # Variants without eliminated pairs share one batched backup
+            unrestricted = np.asarray([restricted[n] is None for n in active], dtype=bool)
+            full = active[unrestricted]
+            if full.size > 0:
+                Q[unrestricted] = _q_values(model, discounts[full], R[full], V[full])
+                backups += full.size * S * A
+            for j, n in enumerate(active):
+                if restricted[n] is not None:
+                    backups += restricted[n].pairs.size
+                    Q[j] = _restricted_q_values(discounts[n], R[n], V[n], restricted[n])
+                restricted[n] = _eliminate_actions(model, discounts[n], Q[j], restricted[n],
+                                                   lower[n], upper[n])
+        else:
+            Q = _q_values(model, discounts[active], R[active], V[active])
+            backups += active.size * S * A
+        V_new = Q.max(axis=-1)
+        greedy = Q.argmax(axis=-1)
 
-        if np.abs(V - V_old).max() <= precision:
-            return V
+        delta = V_new - V[active]
+        residual[active], span[active] = _residual_and_span(delta)
+        changes[active] = np.count_nonzero(greedy != policy[active], axis=-1)
+        V[active] = V_new
+        policy[active] = greedy
 
+        if use_bounds:
+            lower[active], upper[active] = _macqueen_bounds(model, discounts[active], delta)
+        if stopping == 'span':
+            offset[active] = 0.5 * (lower[active] + upper[active])
+            converged = (upper[active] - lower[active]) <= 2.0 * precision
+        else:
+            converged = residual[active] <= precision
+        active = active[~converged]
 
-def policy_iteration(env, discount, precision=1e-3):
-    assert 0.0 <= discount <= 1.0
+        yield _make_stats(batch_shape, i, V + offset[:, None], policy, residual, span,
+                          changes, backups, start)
+        if active.size == 0:
+            return
+
+
+def policy_iteration_steps(env, discount, precision=1e-3, rewards=None):
     assert precision > 0.0
+    model, discounts, R, batch_shape = _prepare_variants(env, discount, rewards)
+    N, S, A = R.shape
 
     # For the sake of determinism, we start with the policy that always chooses action 0
-    policy = np.zeros(env.observation_space.n, dtype=np.int32)
+    policy = np.zeros((N, S), dtype=np.int32)
+    V = np.zeros((N, S), dtype=np.float64)
+    residual, span, changes = np.zeros(N), np.zeros(N), np.zeros(N, dtype=np.int64)
 
-    while True:
-        V_policy = policy_evaluation(env, discount, policy, precision)
-        policy, stable = policy_improvement(env, discount, policy, V_policy, precision)
-        if stable:
-            return policy
+    start = time.perf_counter()
+    backups = 0
+    active = np.arange(N)
+    for i in itertools.count(1):
+        sweeps = _policy_evaluation_sweeps(model, discounts[active], R[active], policy[active], precision)
+        for V_policy, _, _, n_backups in sweeps:
+            backups += n_backups
+
+        new_policy, stable, Q = _policy_improvement(
+            model, discounts[active], R[active], policy[active], V_policy, precision)
+        residual[active], span[active] = _residual_and_span(Q.max(axis=-1) - V_policy)
+        changes[active] = np.count_nonzero(new_policy != policy[active], axis=-1)
+        V[active] = V_policy
+        policy[active] = new_policy
+        backups += active.size * S * A
+        active = active[~stable]
 
+        yield _make_stats(batch_shape, i, V, policy, residual, span, changes, backups, start)
+        if active.size == 0:
+            return
 
-def policy_evaluation(env, discount, policy, precision=1e-3):
-    assert 0.0 <= discount <= 1.0
+
+def policy_evaluation_sweeps(env, discount, policy, precision=1e-3, rewards=None):
+    """Policies may be deterministic, given as integer actions with shape (..., S), or
+    stochastic, given as floating-point action probabilities with shape (..., S, A). Any
+    leading dimensions are batch dimensions, which broadcast against the discounts and
+    rewards (e.g. to evaluate many learned policies at once)."""
     assert precision > 0.0
-    V = np.zeros(policy.shape, dtype=np.float64)
+    policy = np.asarray(policy)
+    policy_ndim = 2 if _is_stochastic(policy) else 1
+    policy_shape = policy.shape[-policy_ndim:]
+    model, discounts, R, batch_shape = _prepare_variants(
+        env, discount, rewards, extra_batch_shape=policy.shape[:-policy_ndim])
+    policy = np.broadcast_to(policy, batch_shape + policy_shape)
+    policy = policy.reshape((len(discounts),) + policy_shape)
 
-    while True:
-        V_old = V.copy()
+    start = time.perf_counter()
+    backups = 0
+    sweeps = _policy_evaluation_sweeps(model, discounts, R, policy, precision)
+    for i, (V, residual, span, n_backups) in enumerate(sweeps, start=1):
+        backups += n_backups
+        yield _make_stats(batch_shape, i, V, None, residual, span, None, backups, start)
+
+
+def backward_induction(env, horizon=None, discount=1.0, rewards=None, dtype=np.float64):
+    """Solves the finite-horizon problem exactly with one batched sweep per timestep.
+
+    Returns time-indexed values V with shape (..., H + 1, S) and a policy with shape
+    (..., H, S), where V[t] is the optimal return with H - t steps remaining (so V[H] is
+    zero) and policy[t] is the optimal action at timestep t. The horizon defaults to the
+    environment's `max_episode_steps` (e.g. 100 for Jack's Car Rental). The values can
+    be stored with a smaller `dtype` such as np.float32 to reduce memory; the policy is
+    stored with the smallest integer type that fits the actions.
+    """
+    horizon = time_limit(env, horizon)
+    assert horizon is not None, "horizon must be given for environments without a time limit"
+    assert horizon > 0
+    model, discounts, R, batch_shape = _prepare_variants(env, discount, rewards)
+    N, S, A = R.shape
+
+    V = np.zeros((horizon + 1, N, S), dtype=dtype)
+    policy = np.zeros((horizon, N, S), dtype=np.min_scalar_type(A - 1))
+    for t in reversed(range(horizon)):
+        Q = _q_values(model, discounts, R, V[t + 1].astype(np.float64))
+        policy[t] = Q.argmax(axis=-1)
+        V[t] = Q.max(axis=-1)
+
+    # Move the time axis behind the batch dimensions
+    V = np.moveaxis(V, 0, 1).reshape(batch_shape + (horizon + 1, S))
+    policy = np.moveaxis(policy, 0, 1).reshape(batch_shape + (horizon, S))
+    return V, policy
+
+
+def q_values(env, discount, V, rewards=None):
+    """Computes the Q-values of the given state values in one vectorized backup over the
+    compiled model. `V` has shape (..., S) and its leading dimensions broadcast against
+    the discounts and rewards; the result has shape (..., S, A)."""
+    V = np.asarray(V, dtype=np.float64)
+    model, discounts, R, batch_shape = _prepare_variants(
+        env, discount, rewards, extra_batch_shape=V.shape[:-1])
+    V = np.broadcast_to(V, batch_shape + V.shape[-1:]).reshape(len(discounts), -1)
+    Q = _q_values(model, discounts, R, V)
+    return Q.reshape(batch_shape + Q.shape[-2:])
+
+
+def relative_value_iteration(env, precision=1e-3, reference_state=0, aperiodicity=0.1,
+                             rewards=None, callback=None, time_budget=None):
+    sweeps = relative_value_iteration_sweeps(env, precision, reference_state, aperiodicity,
+                                             rewards)
+    stats = _run(sweeps, callback, time_budget)
+    return stats.gain, stats.values
+
+
+def relative_value_iteration_sweeps(env, precision=1e-3, reference_state=0, aperiodicity=0.1,
+                                    rewards=None):
+    """Relative value iteration for the undiscounted average-reward criterion, for
+    environments that never terminate (e.g. Jack's Car Rental).
+
+    Yields SweepStats whose `values` are the bias (relative values, zero at the reference
+    state) and whose `gain` is the average reward per step, which is pinned between the
+    smallest and largest change in values. Stops once that interval is narrower than
+    `precision`. The greedy policy is `q_values(env, 1.0, bias).argmax(axis=-1)`.
+
+    To guarantee convergence for periodic chains, the transitions are mixed with
+    self-loops with probability `aperiodicity` in [0, 1); this changes neither the bias
+    nor the optimal policy.
+    """
+    assert precision > 0.0
+    assert 0.0 <= aperiodicity < 1.0
+    model, discounts, R, batch_shape = _prepare_variants(env, 1.0, rewards)
+    assert not model.dynamics.terminates, \
+        "relative value iteration requires an environment that never terminates"
+    N, S, A = R.shape
+    tau = 1.0 - aperiodicity
+    h = np.zeros((N, S), dtype=np.float64)
+    policy = np.zeros((N, S), dtype=np.int64)
+    residual, span = np.zeros(N), np.zeros(N)
+    changes, gain = np.zeros(N, dtype=np.int64), np.zeros(N)
+
+    start = time.perf_counter()
+    backups = 0
+    active = np.arange(N)
+    for i in itertools.count(1):
+        Q = _q_values(model, discounts[active], R[active], h[active])
+        greedy = Q.argmax(axis=-1)
+        w = tau * Q.max(axis=-1) + (1.0 - tau) * h[active]
 
-        for s in env.states():
-            V[s] = backup(env, discount, V, s, policy[s])
+        delta = w - h[active]
+        residual[active], span[active] = _residual_and_span(delta)
+        gain[active] = 0.5 * (delta.min(axis=-1) + delta.max(axis=-1)) / tau
+        changes[active] = np.count_nonzero(greedy != policy[active], axis=-1)
+        h[active] = w - w[:, reference_state, None]
+        policy[active] = greedy
+        backups += active.size * S * A
+        active = active[span[active] / tau > precision]
 
-        if np.abs(V - V_old).max() <= precision:
-            return V
+        stats = _make_stats(batch_shape, i, h, policy, residual, span, changes, backups, start)
+        yield stats._replace(gain=gain.reshape(batch_shape).copy()[()])
+        if active.size == 0:
+            return
 
 
 ####################
@@ -55,23 +295,152 @@ def policy_evaluation(env, discount, policy, precision=1e-3):
 
 
 def policy_improvement(env, discount, policy, V_policy, precision=1e-3):
-    policy_old = policy.copy()
-    V_old = V_policy.copy()
-
-    for s in env.states():
-        Q_values = [backup(env, discount, V_policy, s, a) for a in env.actions()]
-        policy[s] = np.argmax(Q_values)
-        V_policy[s] = max(Q_values)
-
-    stable = np.logical_or(
-        policy == policy_old,
-        np.abs(V_policy - V_old).max() <= precision,
-    ).all()
-
-    return policy, stable
+    model = env.unwrapped.compile_model()
+    R = model.expected_rewards()
+    new_policy, stable, Q = _policy_improvement(
+        model, np.asarray([discount]), R[None], policy[None], V_policy[None], precision)
+    policy[:] = new_policy[0]
+    V_policy[:] = Q[0].max(axis=-1)
+    return policy, bool(stable[0])
 
 
 def backup(env, discount, V, state, action):
     next_states, rewards, dones, probs = env.model(state, action)
     bootstraps = (1.0 - dones) * V[next_states]
     return np.sum(probs * (rewards + discount * bootstraps))
+
+
+def _run(iterations, callback, time_budget):
+    """Runs an anytime solver until it converges, the callback returns True, or the time
+    budget is exhausted. Returns the last SweepStats."""
+    for stats in iterations:
+        if callback is not None and callback(stats):
+            break
+        if time_budget is not None and stats.elapsed >= time_budget:
+            break
+    return stats
+
+
+def _prepare_variants(env, discount, rewards, extra_batch_shape=()):
+    """Flattens the discount/reward variants into a single batch dimension. The batch
+    shape can be extended by other arguments (e.g. a stack of policies).
+
+    Returns the compiled model, discounts with shape (N,), expected rewards with shape
+    (N, S, A), and the original (unflattened) batch shape.
+    """
+    model = env.unwrapped.compile_model()
+    discount = np.asarray(discount, dtype=np.float64)
+    assert ((0.0 <= discount) & (discount <= 1.0)).all()
+
+    if rewards is not None:
+        rewards = np.asarray(rewards, dtype=np.float64)
+        assert rewards.shape[-3:] == model.rewards.shape, \
+            "rewards must have the same (S, A, K) shape as the compiled model"
+    R = model.expected_rewards(rewards)
+
+    batch_shape = np.broadcast_shapes(discount.shape, R.shape[:-2], extra_batch_shape)
+    discounts = np.broadcast_to(discount, batch_shape).reshape(-1)
+    R = np.broadcast_to(R, batch_shape + R.shape[-2:]).reshape((-1,) + R.shape[-2:])
+    return model, discounts, R, batch_shape
+
+
+def _make_stats(batch_shape, i, V, policy, residual, span, changes, backups, start):
+    def unbatch(x):
+        return None if x is None else x.reshape(batch_shape + x.shape[1:]).copy()[()]
+    return SweepStats(i, unbatch(V), unbatch(policy), unbatch(residual), unbatch(span),
+                      unbatch(changes), backups, time.perf_counter() - start)
+
+
+def _residual_and_span(delta):
+    return np.abs(delta).max(axis=-1), delta.max(axis=-1) - delta.min(axis=-1)
+
+
+def _macqueen_bounds(model, discounts, delta):
+    """Returns lower and upper bounds on V* - V_new per variant, where delta is
+    V_new - V_old from the last sweep. If episodes can terminate, the transition matrix
+    is substochastic and the bounds must include zero."""
+    low, high = delta.min(axis=-1), delta.max(axis=-1)
+    if model.dynamics.terminates:
+        low, high = np.minimum(low, 0.0), np.maximum(high, 0.0)
+    factor = discounts / (1.0 - discounts)
+    return factor * low, factor * high
+
+
+def _eliminate_actions(model, discount, Q, restricted, lower, upper):
+    """Eliminates the state-action pairs of one variant that are provably suboptimal,
+    setting their Q-values (shape (S, A), modified in place) to -inf. Returns the
+    (possibly further) restricted dynamics, or None if no pair was ever eliminated."""
+    if not (np.isfinite(lower) and np.isfinite(upper)):
+        return restricted
+    S, A = Q.shape
+    pairs = np.arange(S * A) if restricted is None else restricted.pairs
+    q = Q.reshape(-1)[pairs]
+
+    # Bounds on Q* follow from the bounds on V* - V
+    continue_mass = discount * model.dynamics.continue_mass.reshape(-1)[pairs]
+    best_lower = np.full(S * A, -np.inf)
+    best_lower[pairs] = q + continue_mass * lower
+    best_lower = best_lower.reshape(S, A).max(axis=-1)
+    keep = (q + continue_mass * upper) >= best_lower[pairs // A]
+    if keep.all():
+        return restricted
+    Q.reshape(-1)[pairs[~keep]] = -np.inf
+    return model.dynamics.restrict(pairs[keep])
+
+
+def _restricted_q_values(discount, R, V, restricted):
+    """Backs up only the remaining pairs of one variant; eliminated pairs are -inf."""
+    S, A = R.shape
+    Q = np.full(S * A, -np.inf)
+    pairs = restricted.pairs
+    Q[pairs] = R.reshape(-1)[pairs] + discount * restricted.expected_next_values(V)
+    return Q.reshape(S, A)
+
+
+def _q_values(model, discounts, R, V):
+    """Computes Q-values with shape (N, S, A) from value functions with shape (N, S)."""
+    return R + discounts[:, None, None] * model.expected_next_values(V)
+
+
+def _policy_evaluation_sweeps(model, discounts, R, policy, precision):
+    """Yields the values, residuals, spans, and number of backups after each sweep."""
+    N, S, A = R.shape
+    V = np.zeros((N, S), dtype=np.float64)
+    residual, span = np.zeros(N), np.zeros(N)
+    stochastic = _is_stochastic(policy)
+    if stochastic:
+        assert policy.shape[1:] == (S, A)
+        assert np.allclose(policy.sum(axis=-1), 1.0), "action probabilities must sum to 1"
+    else:
+        policy = policy[..., None]
+
+    active = np.arange(N)
+    while True:
+        Q = _q_values(model, discounts[active], R[active], V[active])
+        if stochastic:
+            V_new = np.sum(policy[active] * Q, axis=-1)
+        else:
+            V_new = np.take_along_axis(Q, policy[active], axis=-1)[..., 0]
+        residual[active], span[active] = _residual_and_span(V_new - V[active])
+        V[active] = V_new
+        n_backups = active.size * S * A
+        active = active[residual[active] > precision]
+
+        yield V, residual, span, n_backups
+        if active.size == 0:
+            return
+
+
+def _is_stochastic(policy):
+    return np.issubdtype(policy.dtype, np.floating)
+
+
+def _policy_improvement(model, discounts, R, policy, V_policy, precision):
+    Q = _q_values(model, discounts, R, V_policy)
+    new_policy = np.argmax(Q, axis=-1).astype(policy.dtype)
+
+    stable = np.logical_or(
+        (new_policy == policy).all(axis=-1),
+        np.abs(Q.max(axis=-1) - V_policy).max(axis=-1) <= precision,
+    )
+    return new_policy, stable, Q
@@ -1,8 +1,13 @@
 from abc import ABCMeta, abstractmethod
+import copy
+import numbers
+import threading
 
 import numpy as np
 
 import gym_classics
+from gym_classics.compiled_model import CompiledModel
+from gym_classics.profiling import Profiler
 
 
 if gym_classics._backend == 'gym':
@@ -16,33 +21,66 @@ elif gym_classics._backend == 'gymnasium':
 class BaseEnv(Env, metaclass=ABCMeta):
     """Abstract base class for shared functionality between all environments."""
 
+    # Compiled structures shared by all instances with the same cache key (see below)
+    _shared_structures = {}
+
+    # Methods that are timed while profiling is enabled
+    _profiled_methods = ('step', 'reset', 'model', 'encode', 'decode',
+                         '_sample_random_elements')
+    _profiler = None
+
+    def __new__(cls, *args, **kwargs):
+        env = super().__new__(cls)
+        # Remember the constructor arguments so they can identify the shared structures
+        env._init_args = (args, kwargs)
+        return env
+
     def __init__(self, starts, n_actions, reachable_states=None):
         self._starts = tuple(starts)
         self.action_space = Discrete(n_actions)
         self.np_random = None  # Initialized by calling reset()
 
         self.state = None
-        self._transition_cache = {}
-
-        if reachable_states is None:
-            # Get reachable states by searching through the state space
-            self._reachable_states = set()
-            for s in self._starts:
-                self._search(s, self._reachable_states)
-            self._reachable_states = frozenset(self._reachable_states)
-        else:
-            # Use the provided reachable states
-            self._reachable_states = frozenset(reachable_states)
-
-        # Make look-up tables for quick state-to-integer conversion and vice-versa
-        self._encoder = {}
-        self._decoder = {}
-        i = 0
-        for state in self._reachable_states:
-            self._encoder[state] = i
-            self._decoder[i] = state
-            i += 1
-        self.observation_space = Discrete(i)
+
+        key = self._cache_key()
+        structures = BaseEnv._shared_structures.get(key)
+        if structures is None:
+            if reachable_states is None:
+                # Get reachable states by searching through the state space
+                reachable_states = set()
+                for s in self._starts:
+                    self._search(s, reachable_states)
+            structures = CompiledStructures(reachable_states)
+            if key is not None:
+                BaseEnv._shared_structures[key] = structures
+
+        # These are shared with other instances and must never be modified in place
+        # (except for the lazily filled transition cache)
+        self._structures = structures
+        self._reachable_states = structures.reachable_states
+        self._encoder = structures.encoder
+        self._decoder = structures.decoder
+        self._transition_cache = structures.transition_cache
+        self.observation_space = Discrete(len(self._encoder))
+
+    def _cache_key(self):
+        """Returns the key under which this environment's compiled structures are
+        shared, or None if they cannot be shared. Instances of the same class built with
+        the same (hashable) constructor arguments share one set of structures."""
+        args, kwargs = self._init_args
+        # The render mode does not affect the environment's dynamics
+        kwargs = {k: v for k, v in kwargs.items() if k != 'render_mode'}
+        key = (type(self), args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @staticmethod
+    def clear_shared_structures():
+        """Discards all shared compiled structures; they are rebuilt on demand."""
+        BaseEnv._shared_structures.clear()
 
     def _search(self, state, visited):
         """A recursive depth-first search that adds all reachable states to the visited set."""
@@ -55,6 +93,8 @@ class BaseEnv(Env, metaclass=ABCMeta):
                         self._search(next_state, visited)
 
     def reset(self, seed=None, options=None):
+        """Resets to a random start state. An arbitrary (encoded) state can be chosen
+        instead with `options={'state': s}`."""
         if self.np_random is None and seed is None:
             seed = np.random.default_rng().integers(2**32)
 
@@ -62,10 +102,69 @@ class BaseEnv(Env, metaclass=ABCMeta):
             self.action_space.seed(seed)
             self.np_random = np.random.default_rng(seed)
 
-        i = self.np_random.choice(len(self._starts))
-        self.state = self._starts[i]
+        if options is not None and 'state' in options:
+            self.state = self.decode(options['state'])
+        else:
+            i = self.np_random.choice(len(self._starts))
+            self.state = self._starts[i]
         return self.encode(self.state), {}
 
+    def start_states(self):
+        """Returns the encoded start states as an array."""
+        return np.asarray([self.encode(s) for s in self._starts])
+
+    def get_state(self):
+        """Returns a snapshot of the environment's mutable state (the current state and
+        the random number generator) that can be restored with `set_state`."""
+        return (self.state, self.np_random.bit_generator.state)
+
+    def set_state(self, snapshot):
+        state, rng_state = snapshot
+        self.state = state
+        self.np_random.bit_generator.state = rng_state
+
+    def clone(self):
+        """Returns a copy of the environment that shares all immutable structures (the
+        encoding tables, transition cache, compiled model, and spaces) with this one,
+        and has its own state and random number generator. Much cheaper than
+        `copy.deepcopy`, e.g. for tree-search planners. Clones are not profiled."""
+        env = copy.copy(self)
+        env.np_random = _copy_rng(self.np_random)
+        env.action_space = copy.copy(self.action_space)
+        if self.action_space._np_random is not None:
+            env.action_space._np_random = _copy_rng(self.action_space._np_random)
+        if env.profiler is not None:
+            env.disable_profiling()
+        return env
+
+    def __copy__(self):
+        env = object.__new__(type(self))
+        env.__dict__.update(self.__dict__)
+        return env
+
+    def __reduce__(self):
+        # Only the constructor arguments and the mutable state are serialized; the
+        # unpickled environment is rebuilt from (or builds once) its process's shared
+        # structures, so sending an environment to a worker costs a few hundred bytes
+        args, kwargs = self._init_args
+        return (_rebuild_env, (type(self), args, kwargs), self.__getstate__())
+
+    def __getstate__(self):
+        rngs = [self._np_random, self.action_space._np_random]
+        return {
+            'state': self.state,
+            'rng_states': [None if rng is None else rng.bit_generator.state for rng in rngs],
+            'spec': self.spec,
+        }
+
+    def __setstate__(self, state):
+        self.state = state['state']
+        np_random, action_space_rng = [None if s is None else _rng_from_state(s)
+                                       for s in state['rng_states']]
+        self._np_random = np_random
+        self.action_space._np_random = action_space_rng
+        self.spec = state['spec']
+
     def step(self, action):
         assert self.action_space.contains(action)
         state = self.state
@@ -135,30 +234,156 @@ class BaseEnv(Env, metaclass=ABCMeta):
 
     def model(self, state, action):
         """Returns the transitions from the given state-action pair."""
+        if self._structures.frozen:
+            return self._structures.compiled_model.transitions(state, action)
+
         sa_pair = (state, action)
         if sa_pair in self._transition_cache:
             return self._transition_cache[sa_pair]
 
-        n = self.observation_space.n
-        next_states = np.arange(n)
-        dones = np.zeros(n)
-        rewards = np.zeros(n)
-        probabilities = np.zeros(n)
-
-        for ns, r, d, p in self._generate_transitions(self.decode(state), action):
-            ns = self.encode(ns)
-            dones[ns] = float(d)
-            rewards[ns] = r
-            probabilities[ns] += p
-
+        # Merge the outcomes by next state; this costs O(outcomes), not O(states)
+        encode = self.encode
+        transitions = [(encode(ns), r, d, p)
+                       for ns, r, d, p in self._generate_transitions(self.decode(state), action)]
+        next_states, rewards, dones, probabilities = (np.asarray(x) for x in zip(*transitions))
+        next_states, index = np.unique(next_states.astype(np.int64), return_inverse=True)
+        probabilities = np.bincount(index, weights=probabilities, minlength=len(next_states))
         assert (probabilities >= 0.0).all(), "transition probabilities must be nonnegative"
         assert abs(probabilities.sum() - 1.0) <= 0.01, "transition probabilities must sum to 1"
 
+        # If a next state occurs more than once, its last reward and done flag are kept
+        last = np.zeros(len(next_states), dtype=np.int64)
+        np.maximum.at(last, index, np.arange(len(index)))
+        rewards = rewards.astype(np.float64)[last]
+        dones = dones.astype(np.float64)[last]
+
         i = np.nonzero(probabilities)
         transition = (next_states[i], rewards[i], dones[i], probabilities[i])
         self._transition_cache[sa_pair] = transition
         return transition
 
+    def compile_model(self, dynamics=None):
+        """Returns the full transition model as a CompiledModel. The model is built on
+        the first call and cached afterwards.
+
+        Environments that differ only in their reward functions can pass the Dynamics of
+        an existing model (e.g. `other_env.compile_model().dynamics`, or one loaded from
+        disk) to skip rebuilding the transitions; only the rewards are then computed.
+        """
+        structures = self._structures
+        if structures.compiled_model is None:
+            with structures.lock:
+                if structures.compiled_model is None:
+                    if dynamics is None:
+                        model = self._compile_model()
+                    else:
+                        assert dynamics.n_states == self.observation_space.n
+                        assert dynamics.n_actions == self.action_space.n
+                        model = CompiledModel(dynamics, self._compile_rewards(dynamics))
+                    structures.compiled_model = model
+        return structures.compiled_model
+
+    def freeze(self):
+        """Eagerly compiles the model and makes all model/encode/decode queries
+        read-only, so that one environment can be shared by many threads (e.g. by
+        solvers running in a ThreadPoolExecutor). `model` is then served directly from
+        the compiled arrays and the per-pair transition cache is released.
+
+        Freezing affects all instances sharing this environment's compiled structures.
+        Stepping the environment still mutates its state and is not thread-safe.
+        Returns the environment itself.
+        """
+        structures = self._structures
+        with structures.lock:
+            if not structures.frozen:
+                self.compile_model().freeze()
+                structures.transition_cache.clear()
+                structures.frozen = True
+        return self
+
+    @property
+    def frozen(self):
+        """True if the model has been frozen for read-only, thread-safe access."""
+        return self._structures.frozen
+
+    def _compile_model(self):
+        """Builds the CompiledModel by querying `model` at every state-action pair.
+
+        Override this in the subclass if the model can be built directly as arrays.
+        """
+        return CompiledModel.from_env(self)
+
+    def _compile_rewards(self, dynamics):
+        """Returns this environment's rewards arranged in the (S, A, K) layout of the
+        given dynamics.
+
+        Override this in the subclass if the rewards have a cheaper closed form.
+        """
+        rewards = np.zeros(dynamics.next_states.shape)
+        for s in self.states():
+            state = self.decode(s)
+            for a in self.actions():
+                for ns, r, _, p in self._generate_transitions(state, a):
+                    if p > 0.0:
+                        k = dynamics.outcome_index(s, a, self.encode(ns))
+                        rewards[s, a, k] = r
+        return rewards
+
+    def sample_transitions(self, states, actions, rng=None):
+        """Samples one transition for each of the given state-action pairs in a single
+        vectorized call. States and actions are encoded integers (or arrays of them).
+
+        Returns arrays of next states, rewards, and dones. The environment's own
+        `np_random` generator is used if `rng` is not given.
+        """
+        if rng is None:
+            rng = self.np_random if self.np_random is not None else np.random.default_rng()
+        return self.compile_model().sample(states, actions, rng)
+
+    def enable_profiling(self, profiler=None):
+        """Starts collecting call counts and timings for `step`, `reset`, `model`,
+        `encode`, `decode`, `_sample_random_elements`, and `_generate_transitions`, as
+        well as the number of `model` cache hits and misses. Returns the Profiler, whose
+        `snapshot()` method exports the statistics as a dict.
+
+        A profiler may be given to aggregate statistics over several environments.
+        The methods are wrapped on this instance only, so there is no overhead at all
+        while profiling is disabled.
+        """
+        self.disable_profiling()
+        if profiler is None:
+            profiler = Profiler()
+        for name in self._profiled_methods:
+            setattr(self, name, profiler.wrap(name, getattr(self, name)))
+        # Transitions are generated lazily, so time them until fully consumed
+        self._generate_transitions = profiler.wrap(
+            '_generate_transitions', self._generate_transitions, eager=True)
+
+        model = self.model
+        def profiled_model(state, action):
+            hit = self._structures.frozen or (state, action) in self._transition_cache
+            profiler.count('model_cache_hits' if hit else 'model_cache_misses')
+            return model(state, action)
+        self.model = profiled_model
+
+        self._profiler = profiler
+        return profiler
+
+    def disable_profiling(self):
+        """Stops profiling and restores the original methods. Returns the Profiler that
+        was in use (or None), whose statistics remain available."""
+        profiler = self._profiler
+        if profiler is not None:
+            for name in self._profiled_methods + ('_generate_transitions',):
+                delattr(self, name)
+            del self._profiler
+        return profiler
+
+    @property
+    def profiler(self):
+        """The active Profiler, or None if profiling is disabled."""
+        return self._profiler
+
     @abstractmethod
     def _generate_transitions(self, state, action):
         """Returns a generator over all transitions from this state-action pair.
@@ -166,3 +391,76 @@ class BaseEnv(Env, metaclass=ABCMeta):
         Should be overridden in the subclass.
         """
         raise NotImplementedError
+
+
+def _copy_rng(rng):
+    # Several times faster than copy.deepcopy
+    return _rng_from_state(rng.bit_generator.state)
+
+
+def _rng_from_state(state):
+    bit_generator = getattr(np.random, state['bit_generator'])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+def _rebuild_env(cls, args, kwargs):
+    return cls(*args, **kwargs)
+
+
+class _IdentityMapping:
+    """A read-only mapping from each of the integers 0, ..., n-1 to itself, in O(1)
+    memory. Like the dict tables, it raises KeyError for anything else."""
+
+    def __init__(self, n):
+        self.n = n
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return iter(range(self.n))
+
+    def __contains__(self, key):
+        return isinstance(key, numbers.Integral) and 0 <= key < self.n
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return int(key)
+
+
+class CompiledStructures:
+    """The immutable structures derived from an environment's definition: reachable
+    states, encoding tables, and the transition model. A single instance is shared by
+    all environments with the same cache key, so they are built only once per process.
+    """
+
+    def __init__(self, reachable_states):
+        if isinstance(reachable_states, range) and reachable_states.start == 0 \
+                and reachable_states.step == 1:
+            # The states are already the integers 0, ..., n-1, so the encoding is the
+            # identity and needs no look-up tables
+            self.reachable_states = _IdentityMapping(len(reachable_states))
+            self.encoder = self.decoder = self.reachable_states
+        else:
+            self.reachable_states = frozenset(reachable_states)
+
+            # Make look-up tables for quick state-to-integer conversion and vice-versa
+            self.encoder = {}
+            self.decoder = {}
+            for i, state in enumerate(self.reachable_states):
+                self.encoder[state] = i
+                self.decoder[i] = state
+
+        self.transition_cache = {}
+        self.compiled_model = None
+        self.features = {}  # Feature tables (see gym_classics/features.py)
+
+        # Guards lazy compilation; once frozen, all structures are read-only
+        self.lock = threading.RLock()
+        self.frozen = False
+
+    def __deepcopy__(self, memo):
+        # Shared by design, so copies of an environment keep using the same instance
+        return self
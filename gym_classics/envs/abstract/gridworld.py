@@ -1,16 +1,94 @@
+import warnings
+
+import numpy as np
+
 from gym_classics.envs.abstract.base_env import BaseEnv
 
 
+# Colors (RGB) used by the rgb_array render mode
+EMPTY_COLOR = (255, 255, 255)
+BLOCK_COLOR = (64, 64, 64)
+START_COLOR = (173, 216, 230)
+GOAL_COLOR = (144, 238, 144)
+AGENT_COLOR = (220, 20, 60)
+GRID_COLOR = (200, 200, 200)
+
+
 class Gridworld(BaseEnv):
-    """Abstract class for creating gridworld-type environments."""
+    """Abstract class for creating gridworld-type environments.
 
-    def __init__(self, layout_string, n_actions=None):
+    Supports the 'rgb_array' render mode, which draws each cell as a square of
+    `cell_size` pixels. The static layout is rasterized only once; each frame is a copy
+    of it with the agent's cell overlaid.
+    """
+
+    metadata = {'render_modes': ['rgb_array'], 'render_fps': 4}
+    cell_size = 16
+
+    def __init__(self, layout_string, n_actions=None, render_mode=None):
         self.dims, starts, self._goals, self._blocks = parse_gridworld(layout_string)
+        assert render_mode is None or render_mode in self.metadata['render_modes']
+        self.render_mode = render_mode
+        self._background = None
 
         if n_actions is None:
             n_actions = 4
         super().__init__(starts, n_actions)
 
+    def render(self):
+        if self.render_mode is None:
+            warnings.warn("render() was called without a render_mode; pass "
+                          "render_mode='rgb_array' to the environment's constructor")
+            return None
+        return self.render_batch([self.encode(self.state)])[0]
+
+    def render_batch(self, states):
+        """Renders one rgb_array frame per (encoded) state, e.g. for a batch of
+        environments stepped in lockstep. Returns an array with shape
+        (N, height, width, 3)."""
+        background = self._rasterize_layout()
+        states = np.asarray(states, dtype=np.int64).reshape(-1)
+        cells = np.asarray([self.decode(s) for s in states.tolist()],
+                           dtype=np.int64).reshape(-1, 2)
+
+        frames = np.repeat(background[None], len(states), axis=0)
+        # Pixel rows/columns of the agent's square, inset by a margin
+        c = self.cell_size
+        margin = c // 4
+        offsets = np.arange(margin, c - margin)
+        rows = (self.dims[1] - 1 - cells[:, 1, None]) * c + offsets  # (N, P)
+        cols = cells[:, 0, None] * c + offsets
+        n = np.arange(len(states))[:, None, None]
+        frames[n, rows[:, :, None], cols[:, None, :]] = AGENT_COLOR
+        return frames
+
+    def _rasterize_layout(self):
+        """Returns the (cached) image of the layout without the agent."""
+        if self._background is None:
+            W, H = self.dims
+            grid = np.empty((H, W, 3), dtype=np.uint8)
+            grid[...] = EMPTY_COLOR
+            for (x, y), color in self._cell_colors().items():
+                grid[H - 1 - y, x] = color
+
+            # Scale each cell up to a square and draw the grid lines
+            image = np.repeat(np.repeat(grid, self.cell_size, axis=0), self.cell_size, axis=1)
+            image[::self.cell_size] = GRID_COLOR
+            image[:, ::self.cell_size] = GRID_COLOR
+            image.flags.writeable = False
+            self._background = image
+        return self._background
+
+    def _cell_colors(self):
+        """Returns a dict mapping the cells of the static layout to their colors.
+
+        Override this in the subclass to highlight additional cells.
+        """
+        colors = {cell: START_COLOR for cell in self._starts}
+        colors.update({cell: GOAL_COLOR for cell in self._goals})
+        colors.update({cell: BLOCK_COLOR for cell in self._blocks})
+        return colors
+
     def _next_state(self, state, action):
         next_state = self._move(state, action)
         if self._is_blocked(next_state):
@@ -1,8 +1,18 @@
+import numpy as np
+
+from gym_classics.compiled_model import CompiledModel, Dynamics
 from gym_classics.envs.abstract.base_env import BaseEnv
+from gym_classics.utils import solve_tridiagonal
 
 
 class LinearWalk(BaseEnv):
-    """Abstract class for creating 1-dimensional linear walks."""
+    """Abstract class for creating 1-dimensional linear walks.
+
+    Walks of any odd length can be created directly, e.g.
+    `LinearWalk(length=1000001, left_reward=-1.0, right_reward=1.0)`. The positions are
+    used as their own encodings, and the model is compiled directly as arrays, so walks
+    with millions of states are cheap to build and solve.
+    """
 
     def __init__(self, length, left_reward, right_reward):
         self._length = length
@@ -10,7 +20,8 @@ class LinearWalk(BaseEnv):
         self._right_reward = right_reward
 
         assert length % 2 == 1
-        super().__init__(starts={length // 2}, n_actions=2)
+        # Every position is reachable, so we can skip the search
+        super().__init__(starts={length // 2}, n_actions=2, reachable_states=range(length))
 
     def _next_state(self, state, action):
         state += [-1, 1][action]
@@ -18,15 +29,45 @@ class LinearWalk(BaseEnv):
         return next_state, 1.0
 
     def _reward(self, state, action, next_state):
-        sa_pair = (state, action)
-        return {
-            (0, 0):                self._left_reward,
-            (self._length - 1, 1): self._right_reward,
-        }.get(sa_pair, 0.0)
+        if state == 0 and action == 0:
+            return self._left_reward
+        if state == self._length - 1 and action == 1:
+            return self._right_reward
+        return 0.0
 
     def _done(self, state, action, next_state):
-        sa_pair = (state, action)
-        return sa_pair in {(0, 0), (self._length - 1, 1)}
+        return (state == 0 and action == 0) or (state == self._length - 1 and action == 1)
 
     def _generate_transitions(self, state, action):
         yield self._deterministic_step(state, action)
+
+    def _compile_model(self):
+        S = self._length
+        positions = np.arange(S)
+        next_states = np.stack([positions - 1, positions + 1], axis=-1)
+        rewards = np.zeros((S, 2))
+        dones = np.zeros((S, 2))
+
+        # Stepping off either end terminates (and stays in place, like `step`)
+        next_states[0, 0], rewards[0, 0], dones[0, 0] = 0, self._left_reward, 1.0
+        next_states[-1, 1], rewards[-1, 1], dones[-1, 1] = S - 1, self._right_reward, 1.0
+
+        dynamics = Dynamics(next_states[..., None], dones[..., None], np.ones((S, 2, 1)))
+        return CompiledModel(dynamics, rewards[..., None])
+
+    def exact_values(self, discount=1.0, right_prob=0.5):
+        """Returns the exact values of the policy that moves right with probability
+        `right_prob` (a scalar or one probability per state), by solving the tridiagonal
+        Bellman equations in O(S) time and memory."""
+        S = self._length
+        right_prob = np.broadcast_to(np.asarray(right_prob, dtype=np.float64), (S,))
+        left_prob = 1.0 - right_prob
+
+        # V(s) - discount * [p(s) V(s+1) + (1 - p(s)) V(s-1)] = expected reward
+        diag = np.ones(S)
+        lower = -discount * left_prob[1:]
+        upper = -discount * right_prob[:-1]
+        rhs = np.zeros(S)
+        rhs[0] += left_prob[0] * self._left_reward
+        rhs[-1] += right_prob[-1] * self._right_reward
+        return solve_tridiagonal(lower, diag, upper, rhs)
@@ -26,8 +26,8 @@ class ClassicGridworld(NoisyGridworld):
 |S   |
 """
 
-    def __init__(self):
-        super().__init__(ClassicGridworld.layout)
+    def __init__(self, render_mode=None):
+        super().__init__(ClassicGridworld.layout, render_mode=render_mode)
 
     def _reward(self, state, action, next_state):
         return {(3, 1): -1.0, (3, 2): 1.0}.get(state, 0.0)
@@ -1,6 +1,9 @@
 from gym_classics.envs.abstract.gridworld import Gridworld
 
 
+CLIFF_COLOR = (139, 69, 19)
+
+
 class CliffWalk(Gridworld):
     """The Cliff Walking task, a 12x4 gridworld often used to contrast Sarsa with
     Q-Learning. The agent begins in the bottom-left cell and must navigate to the goal
@@ -24,9 +27,14 @@ class CliffWalk(Gridworld):
 |S          G|
 """
 
-    def __init__(self):
+    def __init__(self, render_mode=None):
         self._cliff = frozenset((x, 0) for x in range(1, 11))
-        super().__init__(CliffWalk.layout)
+        super().__init__(CliffWalk.layout, render_mode=render_mode)
+
+    def _cell_colors(self):
+        colors = super()._cell_colors()
+        colors.update({cell: CLIFF_COLOR for cell in self._cliff})
+        return colors
 
     def _reward(self, state, action, next_state):
         return -100.0 if next_state in self._cliff else -1.0
@@ -41,13 +41,6 @@ class JacksCarRental(BaseEnv):
         states = [(i, j) for i in range(21) for j in range(21)]
         super().__init__(starts={(10, 10)}, n_actions=11, reachable_states=states)
 
-    def reset(self, seed=None, options=None):
-        # Make sure each distribution has access to the np_random module
-        for distr in [self._lot1_requests_distr, self._lot1_dropoffs_distr,
-                      self._lot2_requests_distr, self._lot2_dropoffs_distr]:
-            distr.np_random = self.np_random
-        return super().reset(seed)
-
     def step(self, action):
         assert self.action_space.contains(action)
         state = self.state
@@ -64,10 +57,11 @@ class JacksCarRental(BaseEnv):
         return self.encode(next_state), reward, done, False, {}
 
     def _sample_random_elements(self):
-        lot1_requests = self._lot1_requests_distr.sample()
-        lot1_dropoffs = self._lot1_dropoffs_distr.sample()
-        lot2_requests = self._lot2_requests_distr.sample()
-        lot2_dropoffs = self._lot2_dropoffs_distr.sample()
+        rng = self.np_random
+        lot1_requests = self._lot1_requests_distr.sample(rng)
+        lot1_dropoffs = self._lot1_dropoffs_distr.sample(rng)
+        lot2_requests = self._lot2_requests_distr.sample(rng)
+        lot2_dropoffs = self._lot2_dropoffs_distr.sample(rng)
         requests = [lot1_requests, lot2_requests]
         dropoffs = [lot1_dropoffs, lot2_dropoffs]
         return (requests, dropoffs)
@@ -99,6 +93,17 @@ class JacksCarRental(BaseEnv):
     def _done(self):
         return False  # Environment has no terminal state
 
+    def _compile_rewards(self, dynamics):
+        # The reward depends only on the state-action pair, so we can skip enumerating
+        # the outcomes and broadcast instead
+        rewards = np.zeros((self.observation_space.n, self.action_space.n, 1))
+        for s in self.states():
+            state = self.decode(s)
+            for a in self.actions():
+                action = decode_action(a)
+                rewards[s, a] = self._reward(move_cars(state, action), action)
+        return np.where(dynamics.probs > 0.0, rewards, 0.0)
+
     def _generate_transitions(self, state, action):
         action = decode_action(action)
         for next_state in self.states():
@@ -154,8 +159,8 @@ class TruncatedPoisson:
     def __iter__(self):
         return zip(self.domain, self.Pr)
 
-    def sample(self):
-        return self.np_random.choice(self.domain, p=self.Pr)
+    def sample(self, rng):
+        return rng.choice(self.domain, p=self.Pr)
 
 
 def decode_action(i):
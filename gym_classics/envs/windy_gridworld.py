@@ -28,8 +28,8 @@ class WindyGridworld(Gridworld):
 |          |
 """
 
-    def __init__(self):
-        super().__init__(WindyGridworld.layout)
+    def __init__(self, render_mode=None):
+        super().__init__(WindyGridworld.layout, render_mode=render_mode)
 
     def _next_state(self, state, action):
         wind_strength = self._wind_strength(state)
@@ -66,8 +66,9 @@ class WindyGridworldKings(WindyGridworld):
     **actions:** Move in the 4 cardinal directions and 4 intermediate directions.
     """
 
-    def __init__(self):
-        super(WindyGridworld, self).__init__(WindyGridworld.layout, n_actions=8)
+    def __init__(self, render_mode=None):
+        super(WindyGridworld, self).__init__(WindyGridworld.layout, n_actions=8,
+                                             render_mode=render_mode)
 
     def _move(self, state, action):
         if action < 4:
@@ -91,8 +92,9 @@ class WindyGridworldKingsNoOp(WindyGridworldKings):
     **actions:** Move in the 8 cardinal/intermediate directions or take a no-op action.
     """
 
-    def __init__(self):
-        super(WindyGridworld, self).__init__(WindyGridworld.layout, n_actions=9)
+    def __init__(self, render_mode=None):
+        super(WindyGridworld, self).__init__(WindyGridworld.layout, n_actions=9,
+                                             render_mode=render_mode)
 
     def _move(self, state, action):
         if action == 8:  # No-op
@@ -0,0 +1,81 @@
+"""Precomputed feature tables for linear function approximation.
+
+Each table is an array with one row of features per encoded state, so that the
+features of an observation are simply `table[obs]` (a view, not a copy). Tables are
+computed once per process and shared between all instances of an environment (see
+`BaseEnv` for the shared structures); they are read-only.
+
+    - one_hot: the tabular (indicator) representation, shape (S, S).
+    - coordinates: the raw state flattened to a vector of numbers and scaled to [0, 1]
+      per dimension, e.g. the (x, y) cell of a gridworld, the car counts of Jack's Car
+      Rental, or the position and velocity of a racetrack.
+    - tile_coding: binary features from several offset grids (tilings) laid over the
+      coordinates, shape (S, n_tilings * (tiles_per_dim + 1)**D).
+
+See gym_classics/wrappers.py for an observation wrapper that returns these features.
+"""
+import numpy as np
+
+
+def feature_table(env, kind, **params):
+    """Returns the named feature table (see above) for the environment, computing it on
+    the first request. Extra keyword arguments are passed to the table's function."""
+    env = env.unwrapped
+    cache = env._structures.features
+    key = (kind, tuple(sorted(params.items())))
+    if key not in cache:
+        table = np.ascontiguousarray(_KINDS[kind](env, **params), dtype=np.float32)
+        table.flags.writeable = False
+        cache[key] = table
+    return cache[key]
+
+
+def one_hot(env):
+    return np.eye(env.observation_space.n, dtype=np.float32)
+
+
+def raw_coordinates(env):
+    """Returns the decoded states flattened to rows of numbers, with shape (S, D)."""
+    rows = [_flatten(env.decode(s)) for s in range(env.observation_space.n)]
+    return np.asarray(rows, dtype=np.float64)
+
+
+def coordinates(env):
+    X = raw_coordinates(env)
+    if hasattr(env, 'dims'):
+        # Gridworlds: scale by the grid dimensions rather than the occupied cells
+        low, high = np.zeros(len(env.dims)), np.asarray(env.dims) - 1.0
+    else:
+        low, high = X.min(axis=0), X.max(axis=0)
+    scale = np.where(high > low, high - low, 1.0)
+    return (X - low) / scale
+
+
+def tile_coding(env, n_tilings=8, tiles_per_dim=4):
+    """Tilings are offset from each other by asymmetric displacements (1, 3, 5, ...)
+    in units of 1/n_tilings of a tile, as recommended by Sutton & Barto (2018)."""
+    X = coordinates(env)
+    S, D = X.shape
+    tiles = tiles_per_dim + 1  # One extra tile per dimension to cover the offsets
+    features = np.zeros((S, n_tilings * tiles**D), dtype=np.float32)
+    displacement = 2 * np.arange(D) + 1
+    rows = np.arange(S)
+    for i in range(n_tilings):
+        offset = (i * displacement % n_tilings) / n_tilings
+        cells = np.floor(X * tiles_per_dim + offset).astype(np.int64)
+        index = np.ravel_multi_index(cells.T, (tiles,) * D) if D > 0 else 0
+        features[rows, i * tiles**D + index] = 1.0
+    return features
+
+
+def _flatten(state):
+    if isinstance(state, (tuple, list)):
+        return [x for item in state for x in _flatten(item)]
+    return [state]
+
+
+_KINDS = {
+    'one_hot': one_hot,
+    'coordinates': coordinates,
+    'tile_coding': tile_coding,
+}
@@ -0,0 +1,169 @@
+"""Generates offline datasets of transitions from the registered environments.
+
+Usage:
+    python -m gym_classics.make_dataset ENV_ID --transitions N --output DIR
+        [--policy uniform|optimal|qtable:PATH] [--epsilon 0.1] [--discount 0.99]
+        [--workers N] [--seed 0] [--format npy|npz|memmap] [--batch-size 4096]
+
+The behavior policy is epsilon-greedy with respect to either the optimal Q-values (see
+gym_classics.solve) or a Q table saved with np.save, or else uniformly random. The
+transition budget is split into one shard per worker process, and each worker uses an
+independent random stream spawned from the seed. Every worker simulates many episodes
+in lockstep from the compiled model, restarting them when they terminate or reach the
+environment's `max_episode_steps`, and streams the transitions to its own shard
+directory with a TrajectoryRecorder. The output directory holds the shards and a
+dataset.json file with the generation settings; `load_dataset` reads it back.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+
+import numpy as np
+
+import gym_classics
+from gym_classics.recording import TrajectoryRecorder, load_trajectories
+from gym_classics.utils import epsilon_greedy, policy_sampler
+
+
+DATASET_FILE = 'dataset.json'
+BATCH_SIZE = 4096  # Default number of episodes simulated in lockstep by each worker
+
+
+def behavior_policy(env_id, policy, epsilon=0.1, discount=0.99):
+    """Returns the action probabilities (S, A) described by the policy spec."""
+    env = gym_classics.make_unwrapped(env_id)
+    S, A = env.observation_space.n, env.action_space.n
+    if policy == 'uniform':
+        return np.full((S, A), 1.0 / A)
+    if policy == 'optimal':
+        from gym_classics.solve import optimal_q_values
+        Q = optimal_q_values(env_id, discount)
+    elif policy.startswith('qtable:'):
+        Q = np.load(policy[len('qtable:'):])
+    else:
+        raise ValueError("unknown policy spec '{}'".format(policy))
+    assert Q.shape == (S, A), "Q table must have shape ({}, {})".format(S, A)
+    return epsilon_greedy(Q, epsilon)
+
+
+def make_dataset(env_id, n_transitions, output, policy='uniform', epsilon=0.1,
+                 discount=0.99, n_workers=None, seed=0, format='npy', batch_size=BATCH_SIZE):
+    """Generates the dataset (see the module docstring) and returns its directory."""
+    if n_workers is None:
+        n_workers = os.cpu_count()
+    probs = behavior_policy(env_id, policy, epsilon, discount)
+    # Compile the model up front; forked workers then inherit it instead of rebuilding it
+    gym_classics.make_unwrapped(env_id).compile_model()
+    seeds = np.random.SeedSequence(seed).spawn(n_workers)
+    budgets = [n_transitions // n_workers + (i < n_transitions % n_workers)
+               for i in range(n_workers)]
+    # Workers without any transitions to generate (n_transitions < n_workers) get no shard
+    jobs = [('shard_{:03d}'.format(i), budget, seed_seq)
+            for i, (budget, seed_seq) in enumerate(zip(budgets, seeds)) if budget > 0]
+    shards = [shard for shard, _, _ in jobs]
+
+    os.makedirs(output, exist_ok=True)
+    with ProcessPoolExecutor(n_workers, initializer=gym_classics._init_worker,
+                             initargs=(gym_classics._backend,)) as executor:
+        futures = [executor.submit(generate_shard, env_id, probs, budget,
+                                   os.path.join(output, shard), seed_seq, format,
+                                   batch_size)
+                   for shard, budget, seed_seq in jobs]
+        episodes = [future.result() for future in futures]
+
+    info = {
+        'env_id': env_id,
+        'policy': policy,
+        'epsilon': epsilon if policy != 'uniform' else None,
+        'discount': discount if policy == 'optimal' else None,
+        'seed': seed,
+        'batch_size': batch_size,
+        'n_transitions': n_transitions,
+        'n_episodes': int(sum(episodes)),
+        'shards': shards,
+    }
+    with open(os.path.join(output, DATASET_FILE), 'w') as f:
+        json.dump(info, f, indent=2)
+    return output
+
+
+def generate_shard(env_id, probs, n_transitions, path, seed, format='npy',
+                   batch_size=BATCH_SIZE):
+    """Simulates `n_transitions` transitions of the policy and records them to `path`.
+    The transitions of the `batch_size` concurrent episodes are interleaved, one batch
+    per timestep. Returns the number of episodes that were completed."""
+    env = gym_classics.make_unwrapped(env_id)
+    model = env.compile_model()
+    max_steps = gym_classics.max_episode_steps(env_id)
+    rng = np.random.default_rng(seed)
+
+    sample_actions = policy_sampler(probs)
+    starts = env.start_states()
+    B = min(batch_size, max(n_transitions, 1))
+    states = starts[rng.integers(len(starts), size=B)]
+    elapsed = np.zeros(B, dtype=np.int64)
+    completed = 0
+
+    capacity = n_transitions if format == 'memmap' else None
+    with TrajectoryRecorder(path, format=format, capacity=capacity,
+                            metadata={'env_id': env_id}) as recorder:
+        remaining = n_transitions
+        while remaining > 0:
+            actions = sample_actions(states, rng)
+            next_states, rewards, dones = model.sample(states, actions, rng)
+            terminated = dones > 0.0
+            elapsed += 1
+            if max_steps is not None:
+                truncated = ~terminated & (elapsed >= max_steps)
+            else:
+                truncated = np.zeros(B, dtype=bool)
+
+            n = min(B, remaining)
+            recorder.add_batch(states[:n], actions[:n], rewards[:n], next_states[:n],
+                               terminated[:n], truncated[:n])
+            remaining -= n
+
+            ended = terminated | truncated
+            completed += np.count_nonzero(ended[:n])
+            states = np.where(ended, starts[rng.integers(len(starts), size=B)], next_states)
+            elapsed[ended] = 0
+    return completed
+
+
+def load_dataset(path):
+    """Returns the dataset settings (a dict) and a list of Trajectories, one per shard."""
+    with open(os.path.join(path, DATASET_FILE)) as f:
+        info = json.load(f)
+    return info, [load_trajectories(os.path.join(path, shard)) for shard in info['shards']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('env_id')
+    parser.add_argument('--transitions', type=int, required=True,
+                        help="total number of transitions to generate")
+    parser.add_argument('--output', required=True, help="output directory")
+    parser.add_argument('--policy', default='uniform',
+                        help="'uniform', 'optimal', or 'qtable:PATH' (default: uniform)")
+    parser.add_argument('--epsilon', type=float, default=0.1,
+                        help="exploration rate of the epsilon-greedy policies")
+    parser.add_argument('--discount', type=float, default=0.99,
+                        help="discount factor of the optimal policy")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of processes/shards (default: one per CPU)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', default='npy', choices=['npy', 'npz', 'memmap'])
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help="number of episodes simulated in lockstep by each worker")
+    parser.add_argument('--backend', default='gym', choices=['gym', 'gymnasium'])
+    args = parser.parse_args()
+
+    gym_classics.register(args.backend)
+    make_dataset(args.env_id, args.transitions, args.output, args.policy, args.epsilon,
+                 args.discount, args.workers, args.seed, args.format, args.batch_size)
+    print("wrote {} transitions to {}".format(args.transitions, args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Process-parallel versions of the dynamic programming solvers.
+
+The compiled model and the value function are placed in shared memory, and the state
+space is partitioned into contiguous blocks that are backed up by a pool of worker
+processes. Two update schemes are supported:
+
+    - Synchronous (Jacobi): every block reads the values from the previous sweep and
+      writes into a separate array; the sweep ends when all blocks are done.
+
+    - Asynchronous: blocks read and write the shared value function in place, so
+      blocks see the newest values written by other workers. This usually converges in
+      fewer sweeps.
+
+These are intended for large environments, where a single vectorized sweep saturates
+one core; for small environments the inter-process overhead dominates.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+
+import numpy as np
+
+
+def value_iteration(env, discount, precision=1e-3, n_workers=None, block_size=None,
+                    asynchronous=False):
+    return _solve(env, discount, None, precision, n_workers, block_size, asynchronous)
+
+
+def policy_evaluation(env, discount, policy, precision=1e-3, n_workers=None,
+                      block_size=None, asynchronous=False):
+    policy = np.asarray(policy, dtype=np.int64)
+    return _solve(env, discount, policy, precision, n_workers, block_size, asynchronous)
+
+
+def _solve(env, discount, policy, precision, n_workers, block_size, asynchronous):
+    assert 0.0 <= discount <= 1.0
+    assert precision > 0.0
+    model = env.unwrapped.compile_model()
+    S = model.n_states
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+    if block_size is None:
+        # A few blocks per worker helps to balance the load
+        block_size = -(-S // (4 * n_workers))
+    assert n_workers > 0 and block_size > 0
+    blocks = [(start, min(start + block_size, S)) for start in range(0, S, block_size)]
+
+    arrays = {
+        'next_states': model.next_states,
+        'continue_probs': model.probs * (1.0 - model.dones),
+        'expected_rewards': model.expected_rewards(),
+        'V': np.zeros(S),
+    }
+    if not asynchronous:
+        arrays['V_new'] = np.zeros(S)
+    if policy is not None:
+        arrays['policy'] = policy
+
+    with SharedArrays(arrays) as shared:
+        V = shared.arrays['V']
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker,
+                                 initargs=(shared.specs,)) as executor:
+            while True:
+                residuals = executor.map(_backup_block, blocks,
+                                         [discount] * len(blocks),
+                                         [asynchronous] * len(blocks))
+                residual = max(residuals)
+                if not asynchronous:
+                    V[:] = shared.arrays['V_new']
+                if residual <= precision:
+                    return V.copy()
+
+
+class SharedArrays:
+    """Context manager that copies NumPy arrays into shared memory blocks, which are
+    released on exit. `specs` describes the blocks so that other processes can attach
+    to them with `attach`."""
+
+    def __init__(self, arrays):
+        self._blocks = []
+        self.arrays = {}
+        self.specs = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._blocks.append(block)
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[...] = array
+            self.arrays[name] = shared
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.arrays.clear()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+    @staticmethod
+    def attach(specs):
+        """Returns the shared memory blocks and NumPy views of the described arrays."""
+        blocks, arrays = [], {}
+        for name, (block_name, shape, dtype) in specs.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        return blocks, arrays
+
+
+##################
+# Worker process #
+##################
+
+
+_worker_blocks = None
+_worker_arrays = None
+
+
+def _init_worker(specs):
+    global _worker_blocks, _worker_arrays
+    _worker_blocks, _worker_arrays = SharedArrays.attach(specs)
+
+
+def _backup_block(block, discount, asynchronous):
+    """Backs up the states in [start, stop) and returns the largest value change."""
+    start, stop = block
+    a = _worker_arrays
+    V = a['V']
+
+    next_states = a['next_states'][start:stop]
+    bootstraps = np.sum(a['continue_probs'][start:stop] * V[next_states], axis=-1)
+    Q = a['expected_rewards'][start:stop] + discount * bootstraps
+
+    if 'policy' in a:
+        policy = a['policy'][start:stop, None]
+        V_block = np.take_along_axis(Q, policy, axis=-1)[:, 0]
+    else:
+        V_block = Q.max(axis=-1)
+
+    residual = np.abs(V_block - V[start:stop]).max()
+    target = V if asynchronous else a['V_new']
+    target[start:stop] = V_block
+    return residual
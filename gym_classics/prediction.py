@@ -0,0 +1,179 @@
+"""Batched policy-evaluation (prediction) experiments, e.g. the random walk studies of
+TD(0), n-step TD, and TD(lambda) with `5Walk-v0` and `19Walk-v0`.
+
+An experiment consists of R independent runs of E episodes each. The episodes are
+generated up front as padded arrays (see `generate_episodes`), and each learner then
+processes all runs and a whole grid of parameter settings at once: the step size and
+the n or lambda parameter are broadcast against each other like NumPy arrays, giving a
+grid with shape G. The learned values have shape G + (R, S), and the RMS errors against
+the true values after every episode have shape G + (R, E).
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from gym_classics.rollouts import DEFAULT_MAX_STEPS
+from gym_classics.utils import policy_sampler, time_limit
+
+
+Episodes = namedtuple('Episodes', [
+    'states',      # Encoded states s_0, ..., s_L of each episode, shape (R, E, T + 1)
+    'rewards',     # Rewards r_0, ..., r_{L-1} of each episode, shape (R, E, T)
+    'lengths',     # Number of steps L in each episode, shape (R, E)
+    'terminated',  # False if the episode was truncated by the time limit, shape (R, E)
+    'n_states',
+])
+
+PredictionResults = namedtuple('PredictionResults', [
+    'values',  # Final value estimates, shape G + (R, S)
+    'errors',  # RMS error after each episode, shape G + (R, E), or None
+])
+
+
+def generate_episodes(env, n_runs, n_episodes, policy=None, rng=None, max_steps=None):
+    """Simulates n_runs * n_episodes episodes of the policy from the compiled model and
+    returns them as Episodes. The policy is an array of action probabilities with shape
+    (S, A) and defaults to the uniform random policy. Episodes are truncated after
+    `max_steps` steps, which defaults to the environment's `max_episode_steps`, or to
+    DEFAULT_MAX_STEPS for environments without a time limit. Entries past the end of an
+    episode are padding and should be ignored.
+    """
+    model = env.unwrapped.compile_model()
+    S, A = model.n_states, model.n_actions
+    policy = np.full((S, A), 1.0 / A) if policy is None else np.asarray(policy)
+    assert policy.shape == (S, A)
+    sample_actions = policy_sampler(policy)
+    max_steps = time_limit(env, max_steps, default=DEFAULT_MAX_STEPS)
+    rng = np.random.default_rng(rng)
+
+    N = n_runs * n_episodes
+    starts = env.unwrapped.start_states()
+    state = starts[rng.integers(len(starts), size=N)]
+    states, rewards = [state.copy()], []
+    lengths = np.zeros(N, dtype=np.int64)
+    terminated = np.zeros(N, dtype=bool)
+
+    # Finished episodes keep "stepping" in place with zero reward, as padding
+    active = np.ones(N, dtype=bool)
+    while active.any() and len(rewards) < max_steps:
+        action = sample_actions(state, rng)
+        next_state, reward, done = model.sample(state, action, rng)
+        state = np.where(active, next_state, state)
+        states.append(state.copy())
+        rewards.append(np.where(active, reward, 0.0))
+        lengths += active
+        terminated |= active & (done > 0.0)
+        active &= (done == 0.0)
+
+    shape = (n_runs, n_episodes)
+    return Episodes(np.stack(states, axis=-1).reshape(shape + (-1,)),
+                    np.stack(rewards, axis=-1).reshape(shape + (-1,)),
+                    lengths.reshape(shape), terminated.reshape(shape), S)
+
+
+def true_values(env, discount=1.0, policy=None):
+    """Returns the exact values of the policy (uniform random by default) by solving the
+    Bellman equations of the compiled model as a linear system."""
+    model = env.unwrapped.compile_model()
+    S, A = model.n_states, model.n_actions
+    policy = np.full((S, A), 1.0 / A) if policy is None else np.asarray(policy)
+
+    # State-to-state continuation probabilities under the policy
+    weights = policy[..., None] * model.dynamics._continue_probs
+    P = np.zeros((S, S))
+    rows = np.broadcast_to(np.arange(S)[:, None, None], model.next_states.shape)
+    np.add.at(P, (rows, model.next_states), weights)
+    r = np.sum(policy * model.expected_rewards(), axis=-1)
+    return np.linalg.solve(np.eye(S) - discount * P, r)
+
+
+def rms_error(V, V_true):
+    """Root-mean-square error over the states (the last axis)."""
+    return np.sqrt(np.mean((V - V_true)**2, axis=-1))
+
+
+def td_zero(episodes, alpha, discount=1.0, initial_values=0.0, V_true=None):
+    """Online tabular TD(0) for every step size in `alpha`."""
+    alpha = np.asarray(alpha, dtype=np.float64)
+    return _learn(episodes, alpha.shape, _td_lambda_episode, discount, initial_values,
+                  V_true, alpha=alpha.reshape(-1), lam=np.zeros(alpha.size))
+
+
+def n_step_td(episodes, alpha, n, discount=1.0, initial_values=0.0, V_true=None):
+    """Online tabular n-step TD for every (alpha, n) setting after broadcasting."""
+    alpha, n = np.broadcast_arrays(np.asarray(alpha, dtype=np.float64), np.asarray(n))
+    assert (n >= 1).all()
+    return _learn(episodes, alpha.shape, _n_step_td_episode, discount, initial_values,
+                  V_true, alpha=alpha.reshape(-1), n=n.reshape(-1).astype(np.int64))
+
+
+def td_lambda(episodes, alpha, lam, discount=1.0, initial_values=0.0, V_true=None):
+    """Online tabular TD(lambda) with accumulating eligibility traces for every
+    (alpha, lambda) setting after broadcasting."""
+    alpha, lam = np.broadcast_arrays(np.asarray(alpha, dtype=np.float64),
+                                     np.asarray(lam, dtype=np.float64))
+    return _learn(episodes, alpha.shape, _td_lambda_episode, discount, initial_values,
+                  V_true, alpha=alpha.reshape(-1), lam=lam.reshape(-1))
+
+
+def _learn(episodes, grid_shape, learn_episode, discount, initial_values, V_true, **params):
+    """Runs `learn_episode` over every episode index and collects the errors. The
+    parameter grid is flattened to P settings, so that V has shape (P, R, S)."""
+    R, E = episodes.lengths.shape
+    S = episodes.n_states
+    P = int(np.prod(grid_shape))
+    V = np.empty((P, R, S))
+    V[...] = initial_values
+    errors = None if V_true is None else np.zeros((P, R, E))
+
+    for e in range(E):
+        learn_episode(V, episodes.states[:, e], episodes.rewards[:, e],
+                      episodes.lengths[:, e], episodes.terminated[:, e], discount, **params)
+        if V_true is not None:
+            errors[..., e] = rms_error(V, V_true)
+
+    unflatten = lambda x: None if x is None else x.reshape(grid_shape + x.shape[1:])
+    return PredictionResults(unflatten(V), unflatten(errors))
+
+
+def _td_lambda_episode(V, states, rewards, lengths, terminated, discount, alpha, lam):
+    P, R, S = V.shape
+    runs = np.arange(R)
+    traces = np.zeros((P, R, S))
+    decay = (discount * lam)[:, None, None]
+    for t in range(lengths.max()):
+        s, next_s = states[:, t], states[:, t + 1]
+        running = (t < lengths)
+        # Only the last step of a terminated episode does not bootstrap
+        bootstrap = running & ~(terminated & (t == lengths - 1))
+
+        td_errors = rewards[:, t] + discount * bootstrap * V[:, runs, next_s] - V[:, runs, s]
+        td_errors *= running
+        traces *= decay
+        traces[:, runs, s] += running
+        V += alpha[:, None, None] * td_errors[..., None] * traces
+
+
+def _n_step_td_episode(V, states, rewards, lengths, terminated, discount, alpha, n):
+    P, R, S = V.shape
+    runs = np.arange(R)
+    settings = np.arange(P)[:, None]
+    T = rewards.shape[-1]
+    # Update the value of each state visited at time tau, in order
+    for tau in range(lengths.max()):
+        running = (tau < lengths)
+        # Number of rewards in the n-step return, truncated at the end of the episode
+        # (zero if the episode has already ended)
+        k = np.minimum(n[:, None], np.maximum(lengths - tau, 0))  # (P, R)
+        G = np.zeros((P, R))
+        for i in range(n.max()):
+            if tau + i >= T:
+                break
+            G += (i < k) * discount**i * rewards[:, tau + i]
+
+        end = np.minimum(tau + k, T)
+        bootstrap = running & ((tau + k < lengths) | ~terminated)
+        G += np.where(bootstrap, discount**k * V[settings, runs, states[runs, end]], 0.0)
+
+        s = states[:, tau]
+        V[:, runs, s] += np.where(running, alpha[:, None] * (G - V[:, runs, s]), 0.0)
@@ -0,0 +1,97 @@
+"""Opt-in instrumentation for the environments' hot paths (see `BaseEnv.enable_profiling`).
+
+Instrumented methods are replaced by timing wrappers on the instance only, so
+environments that are not being profiled run the original methods with no overhead.
+"""
+from collections import Counter
+import time
+
+
+# Durations are binned into power-of-two buckets of nanoseconds: bucket i holds the
+# durations d with 2**(i-1) <= d < 2**i (bucket 0 holds d = 0). The last bucket is
+# open-ended and holds everything above ~1 second.
+N_BUCKETS = 32
+
+
+class Profiler:
+    """Collects call counts, event counters, and timing histograms. One profiler can be
+    shared by several environments to aggregate their statistics."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Discards all statistics collected so far."""
+        self._counters = Counter()
+        self._calls = Counter()
+        self._total_ns = Counter()
+        self._max_ns = Counter()
+        self._histograms = {}
+
+    def count(self, name, n=1):
+        """Increments the named event counter."""
+        self._counters[name] += n
+
+    def record(self, name, duration_ns):
+        """Records one call of the named function that took the given time."""
+        self._calls[name] += 1
+        self._total_ns[name] += duration_ns
+        if duration_ns > self._max_ns[name]:
+            self._max_ns[name] = duration_ns
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = [0] * N_BUCKETS
+        histogram[min(duration_ns.bit_length(), N_BUCKETS - 1)] += 1
+
+    def wrap(self, name, fn, eager=False):
+        """Returns a version of `fn` whose calls are timed under `name`. If `eager` is
+        True, `fn` must return an iterable, which is consumed within the timing so that
+        lazy generators are measured in full."""
+        perf_counter_ns = time.perf_counter_ns
+        record = self.record
+
+        if eager:
+            def wrapper(*args, **kwargs):
+                start = perf_counter_ns()
+                result = list(fn(*args, **kwargs))
+                record(name, perf_counter_ns() - start)
+                return iter(result)
+        else:
+            def wrapper(*args, **kwargs):
+                start = perf_counter_ns()
+                result = fn(*args, **kwargs)
+                record(name, perf_counter_ns() - start)
+                return result
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    def snapshot(self):
+        """Returns the statistics as a plain dict of builtin types, e.g. for JSON:
+
+            {'counters': {name: count},
+             'timings': {name: {'calls', 'total_sec', 'mean_sec', 'max_sec',
+                                'histogram': [[upper_bound_sec, count], ...]}}}
+
+        Only nonempty histogram buckets are listed; the last bucket's upper bound is
+        infinite.
+        """
+        timings = {}
+        for name, calls in self._calls.items():
+            total_ns = self._total_ns[name]
+            histogram = [[bucket_upper_bound(i), count]
+                         for i, count in enumerate(self._histograms[name]) if count > 0]
+            timings[name] = {
+                'calls': calls,
+                'total_sec': total_ns * 1e-9,
+                'mean_sec': total_ns * 1e-9 / calls,
+                'max_sec': self._max_ns[name] * 1e-9,
+                'histogram': histogram,
+            }
+        return {'counters': dict(self._counters), 'timings': timings}
+
+
+def bucket_upper_bound(i):
+    """Returns the exclusive upper bound of histogram bucket i, in seconds."""
+    if i == N_BUCKETS - 1:
+        return float('inf')
+    return 2**i * 1e-9
@@ -0,0 +1,212 @@
+"""Streaming storage of environment transitions in compact typed arrays.
+
+A TrajectoryRecorder collects transitions (one at a time from `step`, or in batches
+from vectorized rollouts) into preallocated buffers, and writes them to a directory in
+one of three formats:
+
+    - 'npy': every full chunk is flushed to one .npy file per field. Loading memory-maps
+      the files, so reading is zero-copy.
+    - 'npz': every full chunk is flushed to one (optionally compressed) .npz file. This
+      is the most compact format, but loading copies the data into memory.
+    - 'memmap': one .npy file per field is preallocated for a fixed `capacity` and
+      written in place. Loading memory-maps each field as a single array.
+
+The directory also holds a metadata.json file with the fields, dtypes, chunk sizes, and
+any user metadata. Use `load_trajectories` to read a directory back.
+"""
+import json
+import os
+
+import numpy as np
+
+
+FIELDS = {
+    'states': np.int32,
+    'actions': np.int32,
+    'rewards': np.float32,
+    'next_states': np.int32,
+    'terminated': np.bool_,
+    'truncated': np.bool_,
+}
+
+FORMATS = {'npy', 'npz', 'memmap'}
+METADATA_FILE = 'metadata.json'
+
+
+class TrajectoryRecorder:
+    """Records transitions to the directory `path` (see the module docstring). Use as a
+    context manager, or call `close()` when done to flush the remaining transitions."""
+
+    def __init__(self, path, format='npy', chunk_size=2**20, capacity=None, compress=False,
+                 metadata=None):
+        assert format in FORMATS
+        assert chunk_size > 0
+        if format == 'memmap':
+            assert capacity is not None and capacity > 0, "memmap format requires a capacity"
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.format = format
+        self._compress = compress
+        self._metadata = dict(metadata or {})
+        self._chunk_sizes = []
+        self._closed = False
+
+        if format == 'memmap':
+            # Write straight into the mapped files; there is only one "chunk"
+            self._capacity = capacity
+            self._buffers = {
+                name: np.lib.format.open_memmap(_field_path(path, name), mode='w+',
+                                                dtype=dtype, shape=(capacity,))
+                for name, dtype in FIELDS.items()
+            }
+        else:
+            self._capacity = chunk_size
+            self._buffers = {name: np.empty(chunk_size, dtype=dtype)
+                             for name, dtype in FIELDS.items()}
+        self._size = 0  # Number of transitions in the current buffers
+        self._total = 0
+
+    def __len__(self):
+        """The total number of transitions recorded so far."""
+        return self._total
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, state, action, reward, next_state, terminated, truncated=False):
+        """Records a single transition, e.g. the arguments and results of `step`."""
+        if self._size == self._capacity:
+            self._make_room()
+        i = self._size
+        b = self._buffers
+        b['states'][i] = state
+        b['actions'][i] = action
+        b['rewards'][i] = reward
+        b['next_states'][i] = next_state
+        b['terminated'][i] = terminated
+        b['truncated'][i] = truncated
+        self._size += 1
+        self._total += 1
+
+    def add_batch(self, states, actions, rewards, next_states, terminated, truncated=False):
+        """Records a batch of transitions given as arrays (scalars are broadcast)."""
+        arrays = dict(zip(FIELDS, np.broadcast_arrays(
+            states, actions, rewards, next_states, terminated, truncated)))
+        n = arrays['states'].size
+        if self.format == 'memmap' and self._size + n > self._capacity:
+            raise ValueError("the recorder is full (capacity={})".format(self._capacity))
+        start = 0
+        while start < n:
+            if self._size == self._capacity:
+                self._make_room()
+            count = min(n - start, self._capacity - self._size)
+            for name, array in arrays.items():
+                self._buffers[name][self._size:self._size + count] = \
+                    array.reshape(-1)[start:start + count]
+            self._size += count
+            self._total += count
+            start += count
+
+    def flush(self):
+        """Writes the buffered transitions to disk and updates the metadata."""
+        assert not self._closed
+        if self.format == 'memmap':
+            for buffer in self._buffers.values():
+                buffer.flush()
+            self._chunk_sizes = [self._size]
+        elif self._size > 0:
+            self._write_chunk()
+        self._write_metadata()
+
+    def close(self):
+        if not self._closed:
+            self.flush()
+            self._buffers = None
+            self._closed = True
+
+    def _make_room(self):
+        if self.format == 'memmap':
+            raise ValueError("the recorder is full (capacity={})".format(self._capacity))
+        self._write_chunk()
+
+    def _write_chunk(self):
+        chunk = len(self._chunk_sizes)
+        arrays = {name: buffer[:self._size] for name, buffer in self._buffers.items()}
+        if self.format == 'npz':
+            save = np.savez_compressed if self._compress else np.savez
+            save(_chunk_path(self.path, chunk), **arrays)
+        else:
+            for name, array in arrays.items():
+                np.save(_field_path(self.path, name, chunk), array)
+        self._chunk_sizes.append(self._size)
+        self._size = 0
+
+    def _write_metadata(self):
+        metadata = {
+            'format': self.format,
+            'fields': {name: np.dtype(dtype).str for name, dtype in FIELDS.items()},
+            'chunk_sizes': self._chunk_sizes,
+            'metadata': self._metadata,
+        }
+        # Replace the file atomically so that readers never see a partial write
+        path = os.path.join(self.path, METADATA_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+
+class Trajectories:
+    """Transitions read back from a directory written by a TrajectoryRecorder."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            info = json.load(f)
+        self.path = path
+        self.format = info['format']
+        self.chunk_sizes = info['chunk_sizes']
+        self.metadata = info['metadata']
+
+    def __len__(self):
+        return sum(self.chunk_sizes)
+
+    def chunks(self):
+        """Yields each chunk as a dict of arrays. For the 'npy' and 'memmap' formats,
+        these are read-only memory maps of the files (no data is copied)."""
+        for chunk, size in enumerate(self.chunk_sizes):
+            if self.format == 'npz':
+                with np.load(_chunk_path(self.path, chunk)) as data:
+                    yield {name: data[name] for name in FIELDS}
+            else:
+                if self.format == 'memmap':
+                    chunk = None
+                yield {name: np.load(_field_path(self.path, name, chunk),
+                                     mmap_mode='r')[:size]
+                       for name in FIELDS}
+
+    def arrays(self):
+        """Returns all transitions as one dict of arrays. This is zero-copy for a
+        single-chunk dataset in the 'npy' or 'memmap' format; otherwise the chunks are
+        concatenated in memory."""
+        chunks = list(self.chunks())
+        if len(chunks) == 1:
+            return chunks[0]
+        if not chunks:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in FIELDS.items()}
+        return {name: np.concatenate([c[name] for c in chunks]) for name in FIELDS}
+
+
+def load_trajectories(path):
+    return Trajectories(path)
+
+
+def _field_path(path, name, chunk=None):
+    if chunk is None:
+        return os.path.join(path, name + '.npy')
+    return os.path.join(path, '{}_{:05d}.npy'.format(name, chunk))
+
+
+def _chunk_path(path, chunk):
+    return os.path.join(path, 'chunk_{:05d}.npz'.format(chunk))
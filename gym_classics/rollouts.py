@@ -0,0 +1,74 @@
+"""Monte Carlo evaluation of tabular policies by simulating many episodes at once.
+
+Rather than stepping one environment at a time, all episodes are advanced together: on
+every timestep, one vectorized call to the compiled model samples the transitions of
+all episodes that are still running.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from gym_classics.utils import policy_sampler, time_limit
+
+
+# Time limit for environments without a `max_episode_steps`, so that policies which
+# never reach a terminal state cannot run forever
+DEFAULT_MAX_STEPS = 10000
+
+RolloutResults = namedtuple('RolloutResults', [
+    'returns',    # Discounted return of each episode, shape (N,)
+    'lengths',    # Number of steps taken in each episode, shape (N,)
+    'truncated',  # True if the episode was cut off by the time limit, shape (N,)
+    'visits',     # Total state-action visitation counts over all episodes, shape (S, A), or None
+])
+
+
+def rollouts(env, policy, n_episodes, discount=1.0, max_steps=None, rng=None,
+             count_visits=False):
+    """Runs `n_episodes` episodes of the policy in parallel and returns their returns,
+    lengths, and truncation flags as a RolloutResults.
+
+    The policy is either an array of actions with shape (S,) or an array of action
+    probabilities with shape (S, A). Episodes start from the environment's start states
+    (like `reset`) and are truncated after `max_steps` steps, which defaults to the
+    environment's `max_episode_steps` (e.g. 100 for Jack's Car Rental), or to
+    DEFAULT_MAX_STEPS for environments without a time limit.
+
+    `rng` may be a NumPy Generator or a seed. If `count_visits` is True, the number of
+    times each state-action pair was visited is also returned.
+    """
+    model = env.unwrapped.compile_model()
+    S, A = model.n_states, model.n_actions
+    policy = np.asarray(policy)
+    assert policy.shape in {(S,), (S, A)}
+    assert n_episodes > 0
+    sample_actions = policy_sampler(policy)
+    max_steps = time_limit(env, max_steps, default=DEFAULT_MAX_STEPS)
+    rng = np.random.default_rng(rng)
+
+    starts = env.unwrapped.start_states()
+    states = starts[rng.integers(len(starts), size=n_episodes)]
+    returns = np.zeros(n_episodes)
+    lengths = np.zeros(n_episodes, dtype=np.int64)
+    truncated = np.zeros(n_episodes, dtype=bool)
+    visits = np.zeros((S, A), dtype=np.int64) if count_visits else None
+
+    # Indices of the episodes that are still running
+    active = np.arange(n_episodes)
+    for t in range(max_steps):
+        s = states[active]
+        a = sample_actions(s, rng)
+        next_states, rewards, dones = model.sample(s, a, rng)
+
+        returns[active] += discount**t * rewards
+        lengths[active] += 1
+        if count_visits:
+            np.add.at(visits, (s, a), 1)
+
+        states[active] = next_states
+        active = active[dones == 0.0]
+        if active.size == 0:
+            break
+    truncated[active] = True
+
+    return RolloutResults(returns, lengths, truncated, visits)
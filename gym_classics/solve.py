@@ -0,0 +1,133 @@
+"""Precomputes optimal solutions for the registered environments.
+
+Usage:
+    python -m gym_classics.solve [--envs ID ...] [--discounts 0.9 0.95 ...] [--workers N]
+
+Every environment is solved for all of the requested discounts in one batched value
+iteration, and environments are distributed across a process pool. The solutions (V*,
+Q*, and a greedy optimal policy) are stored as .npz files in a versioned cache directory,
+from which `optimal_values` and `optimal_q_values` load them instantly. Solutions that
+are missing from the cache are computed on demand.
+
+The cache directory is $GYM_CLASSICS_CACHE if set, or ~/.cache/gym_classics otherwise.
+Bump CACHE_VERSION whenever an environment's dynamics or rewards change.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+import warnings
+
+import numpy as np
+
+import gym_classics
+from gym_classics.dynamic_programming import q_values, value_iteration
+
+
+CACHE_VERSION = 1
+DEFAULT_DISCOUNTS = (0.9, 0.95, 0.99)
+PRECISION = 1e-8
+
+
+def optimal_values(env_id, discount, cache_dir=None):
+    """Returns V* for the registered environment and discount."""
+    return _load(env_id, discount, cache_dir)['V']
+
+
+def optimal_q_values(env_id, discount, cache_dir=None):
+    """Returns Q* for the registered environment and discount, with shape (S, A)."""
+    return _load(env_id, discount, cache_dir)['Q']
+
+
+def optimal_policy(env_id, discount, cache_dir=None):
+    """Returns a deterministic optimal policy (greedy with respect to Q*)."""
+    return _load(env_id, discount, cache_dir)['policy']
+
+
+def solution_path(env_id, discount, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = os.environ.get('GYM_CLASSICS_CACHE',
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'gym_classics'))
+    directory = os.path.join(cache_dir, 'solutions', 'v{}'.format(CACHE_VERSION))
+    return os.path.join(directory, '{}_discount={!r}.npz'.format(env_id, float(discount)))
+
+
+def solve(env_id, discounts, cache_dir=None, overwrite=False):
+    """Solves the environment for every discount that is not already cached (or all of
+    them if `overwrite` is True) and stores the solutions. Returns the paths of all
+    available solutions; discount=1.0 is skipped for environments that never terminate,
+    since their values are unbounded."""
+    discounts = sorted({float(d) for d in discounts})
+    paths = {d: solution_path(env_id, d, cache_dir) for d in discounts}
+    todo = [d for d in discounts if overwrite or not os.path.exists(paths[d])]
+    if not todo:
+        return list(paths.values())
+
+    env = gym_classics.make_unwrapped(env_id)
+    model = env.compile_model()
+    if not model.dynamics.terminates and 1.0 in todo:
+        warnings.warn("{} never terminates; skipping discount=1.0".format(env_id))
+        todo.remove(1.0)
+        del paths[1.0]
+
+    # Discounts < 1 can use the tighter span stopping rule, which bounds the error in V*
+    discounted = [d for d in todo if d < 1.0]
+    solutions = {}
+    if discounted:
+        V = value_iteration(env, discounted, PRECISION, stopping='span')
+        solutions.update(zip(discounted, V))
+    if 1.0 in todo:
+        solutions[1.0] = value_iteration(env, 1.0, PRECISION)
+
+    for discount, V in solutions.items():
+        Q = q_values(env, discount, V)
+        _save(paths[discount], V=V, Q=Q, policy=Q.argmax(axis=-1), discount=discount)
+    return list(paths.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--envs', nargs='+', default=[e['id'] for e in gym_classics._registry],
+                        help="environment ids to solve (default: all registered)")
+    parser.add_argument('--discounts', nargs='+', type=float, default=DEFAULT_DISCOUNTS)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of processes (default: one per CPU)")
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--backend', default='gym', choices=['gym', 'gymnasium'])
+    parser.add_argument('--overwrite', action='store_true',
+                        help="re-solve even if a cached solution exists")
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(args.workers, initializer=gym_classics._init_worker,
+                             initargs=(args.backend,)) as executor:
+        futures = {env_id: executor.submit(solve, env_id, args.discounts,
+                                           args.cache_dir, args.overwrite)
+                   for env_id in args.envs}
+        for env_id, future in futures.items():
+            paths = future.result()
+            print("{}: {} solutions".format(env_id, len(paths)))
+
+
+def _load(env_id, discount, cache_dir):
+    path = solution_path(env_id, discount, cache_dir)
+    if not os.path.exists(path):
+        assert gym_classics._backend is not None, "call gym_classics.register() first"
+        solve(env_id, [discount], cache_dir)
+        if not os.path.exists(path):
+            raise ValueError("{} has no solution for discount={}".format(env_id, discount))
+    with np.load(path) as data:
+        return dict(data)
+
+
+def _save(path, **arrays):
+    # Write to a temporary file first so that readers never see a partial file
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+if __name__ == '__main__':
+    main()
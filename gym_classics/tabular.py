@@ -0,0 +1,90 @@
+"""Tabular temporal-difference control for many independent seeds at once.
+
+The learners keep a Q tensor with shape (M, S, A) for M independent runs and step M
+copies of the environment in lockstep, sampling all of their transitions from the
+compiled model with one vectorized call per timestep. The learning rate and epsilon may
+differ between runs (arrays of shape (M,)), so a hyperparameter sweep can be run as a
+single batch.
+
+Episodes restart from a start state when they terminate or when the environment's
+`max_episode_steps` is reached. A truncated episode still bootstraps from its last
+state, since its value was not actually zero.
+"""
+import numpy as np
+
+from gym_classics.utils import epsilon_greedy, time_limit
+
+
+def q_learning(env, n_seeds, n_steps, discount, learning_rate, epsilon, rng=None):
+    return _td_control(env, 'q_learning', n_seeds, n_steps, discount, learning_rate,
+                       epsilon, rng)
+
+
+def sarsa(env, n_seeds, n_steps, discount, learning_rate, epsilon, rng=None):
+    return _td_control(env, 'sarsa', n_seeds, n_steps, discount, learning_rate,
+                       epsilon, rng)
+
+
+def expected_sarsa(env, n_seeds, n_steps, discount, learning_rate, epsilon, rng=None):
+    return _td_control(env, 'expected_sarsa', n_seeds, n_steps, discount, learning_rate,
+                       epsilon, rng)
+
+
+def _td_control(env, algorithm, n_seeds, n_steps, discount, learning_rate, epsilon, rng):
+    """Runs `n_steps` steps of the algorithm in each of `n_seeds` runs with epsilon-greedy
+    behavior, and returns the learned Q-values with shape (M, S, A)."""
+    assert 0.0 <= discount <= 1.0
+    model = env.unwrapped.compile_model()
+    S, A = model.n_states, model.n_actions
+    M = n_seeds
+    learning_rate = np.broadcast_to(np.asarray(learning_rate, dtype=np.float64), (M,))
+    epsilon = np.broadcast_to(np.asarray(epsilon, dtype=np.float64), (M,))
+    rng = np.random.default_rng(rng)
+
+    max_steps = time_limit(env)
+    starts = env.unwrapped.start_states()
+
+    def select_actions(Q_states):
+        # Epsilon-greedy action selection for every run; ties go to the first action
+        explore = rng.random(M) < epsilon
+        random_actions = rng.integers(A, size=M)
+        return np.where(explore, random_actions, Q_states.argmax(axis=-1))
+
+    runs = np.arange(M)
+    Q = np.zeros((M, S, A))
+    states = starts[rng.integers(len(starts), size=M)]
+    elapsed = np.zeros(M, dtype=np.int64)
+    actions = select_actions(Q[runs, states])
+
+    for _ in range(n_steps):
+        next_states, rewards, dones = model.sample(states, actions, rng)
+        Q_next = Q[runs, next_states]
+        next_actions = select_actions(Q_next)
+
+        if algorithm == 'q_learning':
+            bootstraps = Q_next.max(axis=-1)
+        elif algorithm == 'sarsa':
+            bootstraps = Q_next[runs, next_actions]
+        elif algorithm == 'expected_sarsa':
+            probs = epsilon_greedy(Q_next, epsilon[:, None])
+            bootstraps = np.sum(probs * Q_next, axis=-1)
+        else:
+            raise ValueError("unknown algorithm '{}'".format(algorithm))
+
+        targets = rewards + discount * (1.0 - dones) * bootstraps
+        td_errors = targets - Q[runs, states, actions]
+        Q[runs, states, actions] += learning_rate * td_errors
+
+        # Restart the runs whose episodes ended
+        elapsed += 1
+        ended = dones > 0.0
+        if max_steps is not None:
+            ended |= (elapsed >= max_steps)
+        if ended.any():
+            i = np.flatnonzero(ended)
+            next_states[i] = starts[rng.integers(len(starts), size=i.size)]
+            elapsed[i] = 0
+            next_actions[i] = select_actions(Q[runs, next_states])[i]
+
+        states, actions = next_states, next_actions
+    return Q
@@ -1,62 +1,133 @@
 import numpy as np
 
+import gym_classics
+from gym_classics.features import raw_coordinates
+
 
 def clip(x, low, high):
     """A scalar version of numpy.clip. Much faster because it avoids memory allocation."""
     return min(max(x, low), high)
 
 
+def epsilon_greedy(Q, epsilon):
+    """Returns the action probabilities of the epsilon-greedy policy with respect to the
+    given Q-values, with the same shape (..., S, A). Ties are broken by the first action."""
+    Q = np.asarray(Q)
+    A = Q.shape[-1]
+    policy = np.full(Q.shape, epsilon / A)
+    greedy = np.argmax(Q, axis=-1)[..., None]
+    np.put_along_axis(policy, greedy, 1.0 - epsilon + epsilon / A, axis=-1)
+    return policy
+
+
+def policy_sampler(policy):
+    """Returns a function `sample(states, rng)` that draws one action for each of the
+    given (encoded) states. The policy is either an array of actions with shape (S,) or
+    an array of action probabilities with shape (S, A)."""
+    policy = np.asarray(policy)
+    if not np.issubdtype(policy.dtype, np.floating):
+        return lambda states, rng: policy[states]
+
+    A = policy.shape[-1]
+    cdf = np.cumsum(policy, axis=-1)
+    cdf /= cdf[:, -1:]
+
+    def sample(states, rng):
+        u = rng.random(np.shape(states))
+        actions = np.count_nonzero(cdf[states] < u[..., None], axis=-1)
+        return np.minimum(actions, A - 1)  # Guard against rounding error
+    return sample
+
+
+def time_limit(env, max_steps=None, default=None):
+    """Returns `max_steps` if given, otherwise the environment's `max_episode_steps`,
+    otherwise `default`. The environment may be wrapped or unwrapped."""
+    if max_steps is None and env.spec is not None:
+        max_steps = env.spec.max_episode_steps
+        if max_steps is None:
+            # Gymnasium clears the limit in the spec of the unwrapped environment
+            try:
+                max_steps = gym_classics.max_episode_steps(env.spec.id)
+            except KeyError:
+                pass
+    return max_steps if max_steps is not None else default
+
+
+def solve_tridiagonal(lower, diag, upper, rhs):
+    """Solves the linear system with the given sub-, main, and super-diagonals (of
+    lengths n-1, n, and n-1) using the Thomas algorithm, in O(n) time and memory. The
+    system must be diagonally dominant, which is the case for Bellman equations."""
+    n = len(diag)
+    assert len(lower) == len(upper) == n - 1 and len(rhs) == n
+    # Python floats are much faster than NumPy scalars in these sequential loops
+    a, b, c, d = [np.asarray(x, dtype=np.float64).tolist() for x in [lower, diag, upper, rhs]]
+
+    # Forward elimination of the sub-diagonal
+    c_prime, d_prime = [0.0] * n, [0.0] * n
+    c_prime[0] = c[0] / b[0] if n > 1 else 0.0
+    d_prime[0] = d[0] / b[0]
+    for i in range(1, n):
+        denom = b[i] - a[i - 1] * c_prime[i - 1]
+        if i < n - 1:
+            c_prime[i] = c[i] / denom
+        d_prime[i] = (d[i] - a[i - 1] * d_prime[i - 1]) / denom
+
+    # Back substitution
+    x = d_prime
+    for i in reversed(range(n - 1)):
+        x[i] -= c_prime[i] * x[i + 1]
+    return np.asarray(x)
+
+
+def grid_projection(env, array, transpose=False):
+    """Projects an array indexed by encoded states (e.g. values or a policy) onto the
+    2-D grid of a gridworld-like environment whose states are (x, y) cells.
+
+    Returns a float array with shape (height, width), laid out like the printed grid:
+    row 0 is the top row (largest y). Cells that are not states are NaN. If `transpose`
+    is True, states are read as (y, x) instead.
+    """
+    cells = _state_coordinates(env)
+    if transpose:
+        cells = cells[:, ::-1]
+    return _project(env.dims, cells, array)
+
+
+def racetrack_projection(env, array):
+    """Like `grid_projection` for racetracks, whose states are (position, velocity)
+    pairs: each cell holds the maximum over all velocities at that position."""
+    positions = _state_coordinates(env)[:, :2]
+    return _project(env._dims, positions, array)
+
+
+def _state_coordinates(env):
+    # Flatten the decoded states into integer rows, one pass over the encoding table
+    return raw_coordinates(env).astype(np.int64)
+
+
+def _project(dims, cells, array):
+    width, height = dims
+    grid = np.full((height, width), np.nan)
+    # Cells shared by several states keep the maximum (fmax ignores the initial NaN)
+    np.fmax.at(grid, (height - 1 - cells[:, 1], cells[:, 0]), np.asarray(array, dtype=np.float64))
+    return grid
+
+
+def format_grid(grid, decimals=2, separator=' ' * 2, signed=True):
+    """Formats a projected grid as text, one line per row; NaN cells are left blank."""
+    fmt = '%' + ('+' if signed else '') + '.' + str(decimals) + 'f'
+    empty = np.isnan(grid)
+    strings = np.char.mod(fmt, np.where(empty, 0.0, grid))
+    strings[empty] = ''
+    maxlen = max(len(x) for x in strings[~empty]) if (~empty).any() else 0
+    strings = np.char.rjust(strings, maxlen)
+    return '\n'.join(separator.join(row) + separator for row in strings.tolist())
+
+
 def print_gridworld(env, array, decimals=2, separator=' ' * 2, signed=True, transpose=False):
-    # First get the string length of the longest number
-    def formatter(x):
-        string = '{:' + ('+' if signed else '') + '.' + str(decimals) + 'f}'
-        return string.format(x)
-    maxlen = max([len(formatter(x)) for x in array])
-
-    # Now we can actually print the values
-    for y in reversed(range(env.dims[1])):
-        for x in range(env.dims[0]):
-            state = (x, y) if not transpose else (y, x)
-            if env.is_reachable(state):
-                s = env.encode(state)
-                print(formatter(array[s]).rjust(maxlen), end=separator)
-            else:
-                print(' ' * maxlen, end=separator)
-        print()
+    grid = grid_projection(env, array, transpose)
+    print(format_grid(grid, decimals, separator, signed))
 
 
 def print_racetrack(env, V):
-    grid_values = np.zeros(env._dims)
-
-    reachable_positions = [pos for (pos, _) in env._reachable_states]
-    velocities = [(x, y) for x in range(env._max_velocity + 1)
-                            for y in range(env._max_velocity + 1)]
-
-    # Helper function to get reachable velocity pairings in this position
-    def valid_states_in_position(pos):
-        states = [(pos, vel) for vel in velocities]
-        return np.asarray([env._encode(s) for s in states if s in env._reachable_states])
-
-    # Set each cell to be the maximum value over the velocities
-    for x in range(env._dims[0]):
-        for y in range(env._dims[1]):
-            pos = (x, y)
-            if pos in reachable_positions:
-                states = valid_states_in_position(pos)
-                grid_values[x, y] = np.max(V[states])
-            else:
-                grid_values[x, y] = np.nan
-
-    # First get the string length of the longest number
-    formatter = lambda v: '{:+.2f}'.format(v)
-    maxlen = max([len(formatter(v)) for v in grid_values.flatten()])
-
-    # Now we can actually print the values
-    for y in reversed(range(env._dims[1])):
-        for x in range(env._dims[0]):
-            v = grid_values[x,y]
-            if not np.isnan(v):
-                print(formatter(v).rjust(maxlen), end=' ')
-            else:
-                print(' ' * maxlen, end=' ')
-        print()
+    print(format_grid(racetrack_projection(env, V), separator=' '))
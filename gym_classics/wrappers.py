@@ -0,0 +1,29 @@
+import numpy as np
+
+import gym_classics
+from gym_classics.features import feature_table
+
+
+if gym_classics._backend == 'gym':
+    from gym import ObservationWrapper
+    from gym.spaces import Box
+elif gym_classics._backend == 'gymnasium':
+    from gymnasium import ObservationWrapper
+    from gymnasium.spaces import Box
+
+
+class FeatureObservation(ObservationWrapper):
+    """Replaces the integer observations with rows of a feature table (see
+    gym_classics/features.py), e.g. `FeatureObservation(env, 'tile_coding', n_tilings=4)`.
+    Each observation is a read-only view into the shared table, so no copies are made.
+    """
+
+    def __init__(self, env, kind='one_hot', **params):
+        super().__init__(env)
+        self.table = feature_table(env, kind, **params)
+        # All feature kinds lie in [0, 1]
+        self.observation_space = Box(low=0.0, high=1.0, shape=self.table.shape[1:],
+                                     dtype=np.float32)
+
+    def observation(self, observation):
+        return self.table[observation]
@@ -0,0 +1,139 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.dynamic_programming import (backward_induction, policy_evaluation,
+                                              policy_iteration, q_values,
+                                              relative_value_iteration, value_iteration)
+from gym_classics.utils import epsilon_greedy
+
+
+class TestBatchedDP(unittest.TestCase):
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0')
+
+    def test_cliff_walk(self):
+        self._run_test('CliffWalk-v0')
+
+    def test_windy_gridworld_kings_stochastic(self):
+        self._run_test('WindyGridworldKingsStochastic-v0')
+
+
+    def _run_test(self, env_id):
+        env = gym.make(env_id)
+        rewards = env.unwrapped.compile_model().rewards
+        discounts = np.asarray([0.5, 0.8, 0.9])
+        precision = 1e-9
+
+        # Batched discounts must match the individual solutions
+        V = value_iteration(env, discounts, precision)
+        policies = policy_iteration(env, discounts, precision)
+        self.assertEqual(V.shape, (3, env.observation_space.n))
+        for i, discount in enumerate(discounts):
+            self.assertTrue(np.allclose(V[i], value_iteration(env, discount, precision)))
+            self.assertTrue((policies[i] == policy_iteration(env, discount, precision)).all())
+
+        # A stack of reward arrays broadcasts against the discounts
+        reward_stack = np.stack([rewards, 2.0 * rewards])
+        V = value_iteration(env, discounts[:, None], precision, rewards=reward_stack)
+        self.assertEqual(V.shape, (3, 2, env.observation_space.n))
+        self.assertTrue(np.allclose(V[:, 1], 2.0 * V[:, 0]))
+
+        V_policy = policy_evaluation(env, discounts[:, None], policies[:, None], precision,
+                                     rewards=reward_stack)
+        self.assertTrue(np.allclose(V_policy[:, 0], V[:, 0]))
+        self.assertTrue(np.allclose(V_policy[:, 1], V[:, 1]))
+
+
+class TestStochasticPolicies(unittest.TestCase):
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0', discount=0.9)
+
+    def test_windy_gridworld_kings_stochastic(self):
+        self._run_test('WindyGridworldKingsStochastic-v0', discount=0.9)
+
+
+    def _run_test(self, env_id, discount):
+        env = gym.make(env_id)
+        S, A = env.observation_space.n, env.action_space.n
+        precision = 1e-9
+
+        # Q* from V* agrees with the optimal values and policy
+        V = value_iteration(env, discount, precision)
+        Q = q_values(env, discount, V)
+        self.assertEqual(Q.shape, (S, A))
+        self.assertTrue(np.allclose(Q.max(axis=-1), V))
+
+        # A one-hot stochastic policy evaluates like the deterministic one
+        policy = policy_iteration(env, discount, precision)
+        one_hot = np.eye(A)[policy]
+        self.assertTrue(np.allclose(policy_evaluation(env, discount, one_hot, precision),
+                                    policy_evaluation(env, discount, policy, precision)))
+
+        # Epsilon-greedy policies: a stack of them is evaluated in one batch
+        epsilons = [0.0, 0.1, 0.5, 1.0]
+        policies = np.stack([epsilon_greedy(Q, epsilon) for epsilon in epsilons])
+        V_policies = policy_evaluation(env, discount, policies, precision)
+        self.assertEqual(V_policies.shape, (len(epsilons), S))
+        self.assertTrue(np.allclose(V_policies[0], V))
+        self.assertTrue((V_policies[1:] <= V + precision).all())
+
+        # Bellman equation for the uniform random policy
+        Q_uniform = q_values(env, discount, V_policies[-1])
+        self.assertTrue(np.allclose(Q_uniform.mean(axis=-1), V_policies[-1]))
+
+
+class TestBackwardInduction(unittest.TestCase):
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0')
+
+    def test_cliff_walk(self):
+        self._run_test('CliffWalk-v0')
+
+    def test_default_horizon(self):
+        # The horizon defaults to the registered time limit, with or without wrappers
+        for env in [gym.make('JacksCarRental-v0'),
+                    gym_classics.make_unwrapped('JacksCarRental-v0')]:
+            V, policy = backward_induction(env, discount=0.9, dtype=np.float32)
+            self.assertEqual(V.shape, (101, 441))
+            self.assertEqual(policy.shape, (100, 441))
+        with self.assertRaises(AssertionError):
+            backward_induction(gym.make('CliffWalk-v0'))
+
+
+    def _run_test(self, env_id):
+        env = gym.make(env_id)
+        S, A = env.observation_space.n, env.action_space.n
+        R = env.unwrapped.compile_model().expected_rewards()
+
+        V, policy = backward_induction(env, horizon=3, discount=[0.5, 0.9])
+        self.assertEqual(V.shape, (2, 4, S))
+        self.assertEqual(policy.shape, (2, 3, S))
+        self.assertTrue((V[:, -1] == 0.0).all())
+        self.assertTrue(np.allclose(V[:, -2], R.max(axis=-1)))
+        for i, discount in enumerate([0.5, 0.9]):
+            Q = q_values(env, discount, V[i, 1])
+            self.assertTrue(np.allclose(V[i, 0], Q.max(axis=-1)))
+
+        # A long horizon approaches the infinite-horizon solution
+        V, _ = backward_induction(env, horizon=500, discount=0.9, dtype=np.float32)
+        self.assertEqual(V.dtype, np.float32)
+        self.assertTrue(np.allclose(V[0], value_iteration(env, 0.9, 1e-9), atol=1e-4))
+
+
+class TestRelativeValueIteration(unittest.TestCase):
+    def test_jacks_car_rental(self):
+        env = gym.make('JacksCarRental-v0')
+        gain, bias = relative_value_iteration(env, precision=1e-6, reference_state=0)
+        self.assertEqual(bias[0], 0.0)
+
+        # Average-reward Bellman equation: g + h(s) = max_a [r(s, a) + E h(S')]
+        Q = q_values(env, 1.0, bias)
+        self.assertTrue(np.allclose(gain + bias, Q.max(axis=-1), atol=1e-5))
+
+    def test_terminating_env(self):
+        with self.assertRaises(AssertionError):
+            relative_value_iteration(gym.make('CliffWalk-v0'))
@@ -0,0 +1,57 @@
+import copy
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+
+
+class TestClone(unittest.TestCase):
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0')
+
+    def test_jacks_car_rental(self):
+        self._run_test('JacksCarRental-v0')
+
+    def test_windy_gridworld_kings_stochastic(self):
+        self._run_test('WindyGridworldKingsStochastic-v0')
+
+    def test_deepcopy(self):
+        env = gym.make('JacksCarRental-v0').unwrapped
+        env.reset(seed=0)
+        self.assertIs(copy.deepcopy(env)._structures, env._structures)
+
+
+    def _run_test(self, env_id):
+        env = gym.make(env_id).unwrapped
+        actions = np.random.default_rng(0).integers(env.action_space.n, size=20)
+
+        # Seeded resets are reproducible
+        env.reset(seed=0)
+        trajectory = self._rollout(env, actions)
+        env.reset(seed=0)
+        self.assertEqual(self._rollout(env, actions), trajectory)
+
+        # A clone continues exactly like the original without affecting it
+        env.reset(seed=1)
+        clone = env.clone()
+        self.assertIs(clone._structures, env._structures)
+        self.assertIsNot(clone.np_random, env.np_random)
+        self.assertEqual(self._rollout(clone, actions), self._rollout(env, actions))
+
+        # Restoring a snapshot replays the same transitions
+        snapshot = env.get_state()
+        trajectory = self._rollout(env, actions)
+        env.set_state(snapshot)
+        self.assertEqual(self._rollout(env, actions), trajectory)
+
+        # Episodes can start from any state
+        for s in [0, env.observation_space.n // 2, env.observation_space.n - 1]:
+            state, _ = env.reset(options={'state': s})
+            self.assertEqual(state, s)
+            self.assertEqual(env.state, env.decode(s))
+
+    def _rollout(self, env, actions):
+        return [env.step(a)[:3] for a in actions]
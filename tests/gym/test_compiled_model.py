@@ -0,0 +1,177 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.compiled_model import CompiledModel
+from gym_classics.dynamic_programming import policy_evaluation
+from gym_classics.envs.abstract.base_env import BaseEnv
+from gym_classics.envs.abstract.linear_walk import LinearWalk
+
+
+class TestCompiledModel(unittest.TestCase):
+    def test_5walk(self):
+        self._run_test('5Walk-v0')
+
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0')
+
+    def test_cliff_walk(self):
+        self._run_test('CliffWalk-v0')
+
+    def test_dyna_maze(self):
+        self._run_test('DynaMaze-v0')
+
+    def test_four_rooms(self):
+        self._run_test('FourRooms-v0')
+
+    def test_windy_gridworld_kings_stochastic(self):
+        self._run_test('WindyGridworldKingsStochastic-v0')
+
+
+    def _run_test(self, env_id):
+        env = gym.make(env_id).unwrapped
+        env.reset(seed=0)
+        model = env.compile_model()
+
+        # The compiled arrays must agree with the model at every state-action pair
+        for s in env.states():
+            for a in env.actions():
+                next_states, rewards, dones, probs = env.model(s, a)
+                k = len(next_states)
+                self.assertTrue((model.next_states[s, a, :k] == next_states).all())
+                self.assertTrue((model.rewards[s, a, :k] == rewards).all())
+                self.assertTrue((model.dones[s, a, :k] == dones).all())
+                self.assertTrue((model.probs[s, a, :k] == probs).all())
+                self.assertTrue((model.probs[s, a, k:] == 0.0).all())
+
+        # Sampled outcomes must be possible and occur with the right frequencies
+        n = 2_000
+        for s in env.states():
+            for a in env.actions():
+                next_states, rewards, dones = env.sample_transitions(np.full(n, s), a)
+                expected_states, expected_rewards, expected_dones, probs = env.model(s, a)
+                k = np.searchsorted(expected_states, next_states)
+                self.assertTrue((expected_states[k] == next_states).all())
+                self.assertTrue((expected_rewards[k] == rewards).all())
+                self.assertTrue((expected_dones[k] == dones).all())
+                freqs = np.bincount(k, minlength=len(probs)) / n
+                self.assertTrue(np.allclose(freqs, probs, atol=0.05))
+
+
+class TestSharedDynamics(unittest.TestCase):
+    def test_classic_gridworld_shaped(self):
+        # Same dynamics as ClassicGridworld, but with a step penalty
+        from gym_classics.envs.classic_gridworld import ClassicGridworld
+
+        class ShapedGridworld(ClassicGridworld):
+            def _reward(self, state, action, next_state):
+                return super()._reward(state, action, next_state) - 0.04
+
+        self._run_test(gym.make('ClassicGridworld-v0').unwrapped, ShapedGridworld())
+
+    def test_jacks_car_rental_modified(self):
+        self._run_test(gym.make('JacksCarRental-v0').unwrapped,
+                       gym.make('JacksCarRentalModified-v0').unwrapped)
+
+
+    def setUp(self):
+        BaseEnv.clear_shared_structures()
+
+    def _run_test(self, env, variant):
+        dynamics = env.compile_model().dynamics
+        model = variant.compile_model(dynamics)
+        self.assertIs(model.dynamics, dynamics)
+
+        # The rewards must match the ones obtained by compiling the variant from scratch
+        BaseEnv.clear_shared_structures()
+        expected = type(variant)().compile_model()
+        self.assertTrue((model.rewards == expected.rewards).all())
+        self.assertTrue((model.next_states == expected.next_states).all())
+
+
+class TestSharedStructures(unittest.TestCase):
+    def test_four_rooms(self):
+        env1 = gym.make('FourRooms-v0').unwrapped
+        env2 = gym.make('FourRooms-v0').unwrapped
+        self.assertIs(env1._encoder, env2._encoder)
+        self.assertIs(env1.compile_model(), env2.compile_model())
+
+        # Each instance still has its own state and random number generator
+        env1.reset(seed=0)
+        env2.reset(seed=1)
+        self.assertIsNot(env1.np_random, env2.np_random)
+        env1.step(1)
+        self.assertNotEqual(env1.state, env2.state)
+
+    def test_different_classes(self):
+        env1 = gym.make('WindyGridworldKings-v0').unwrapped
+        env2 = gym.make('WindyGridworldKingsNoOp-v0').unwrapped
+        self.assertIsNot(env1._structures, env2._structures)
+
+
+class TestFrozenModel(unittest.TestCase):
+    def tearDown(self):
+        BaseEnv.clear_shared_structures()
+
+    def test_windy_gridworld_kings_stochastic(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from gym_classics.dynamic_programming import value_iteration
+
+        BaseEnv.clear_shared_structures()
+        env = gym.make('WindyGridworldKingsStochastic-v0').unwrapped
+        expected = [[env.model(s, a) for a in env.actions()] for s in env.states()]
+        V_expected = value_iteration(env, discount=0.9)
+
+        self.assertIs(env.freeze(), env)
+        self.assertTrue(env.frozen)
+        self.assertTrue(gym.make('WindyGridworldKingsStochastic-v0').unwrapped.frozen)
+        with self.assertRaises(ValueError):
+            env.compile_model().rewards[0, 0, 0] = 1.0
+
+        for s in env.states():
+            for a in env.actions():
+                for x, y in zip(env.model(s, a), expected[s][a]):
+                    self.assertTrue((x == y).all())
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: value_iteration(env, discount=0.9), range(8)))
+        for V in results:
+            self.assertTrue((V == V_expected).all())
+
+
+class TestLongLinearWalk(unittest.TestCase):
+    def test_compiled_model(self):
+        env = LinearWalk(length=101, left_reward=-1.0, right_reward=1.0)
+        model = env.compile_model()
+        reference = CompiledModel.from_env(env)
+        for name in ['next_states', 'rewards', 'dones', 'probs']:
+            self.assertTrue((getattr(model, name) == getattr(reference, name)).all())
+
+    def test_exact_values(self):
+        env = LinearWalk(length=101, left_reward=-1.0, right_reward=1.0)
+        self.assertTrue(np.allclose(env.exact_values(), np.linspace(-1.0, 1.0, 103)[1:-1]))
+
+        right_prob = np.linspace(0.1, 0.9, 101)
+        policy = np.stack([1.0 - right_prob, right_prob], axis=-1)
+        self.assertTrue(np.allclose(env.exact_values(0.9, right_prob),
+                                    policy_evaluation(env, 0.9, policy, precision=1e-12)))
+
+    def test_million_states(self):
+        env = LinearWalk(length=10**6 + 1, left_reward=0.0, right_reward=1.0)
+        self.assertEqual(env.observation_space.n, 10**6 + 1)
+        self.assertEqual(env.encode(12345), 12345)
+
+        # The identity encoding rejects states that do not exist, like the dict tables
+        for state in [-1, 10**6 + 1, 2.0]:
+            self.assertFalse(env.is_reachable(state))
+            with self.assertRaises(KeyError):
+                env.encode(state)
+            with self.assertRaises(KeyError):
+                env.decode(state)
+
+        state, _ = env.reset(seed=0)
+        self.assertEqual(state, 500000)
+        self.assertEqual(env.step(1)[0], 500001)
@@ -0,0 +1,56 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.features import feature_table
+from gym_classics.wrappers import FeatureObservation
+
+
+class TestFeatures(unittest.TestCase):
+    def test_cliff_walk(self):
+        env = gym.make('CliffWalk-v0')
+        self._run_test(env)
+        # Coordinates are scaled by the grid dimensions (12 x 4)
+        X = feature_table(env, 'coordinates')
+        for s in env.unwrapped.states():
+            x, y = env.unwrapped.decode(s)
+            self.assertTrue(np.allclose(X[s], [x / 11, y / 3]))
+
+    def test_jacks_car_rental(self):
+        env = gym.make('JacksCarRental-v0')
+        self._run_test(env)
+        X = feature_table(env, 'coordinates')
+        self.assertTrue(np.allclose(X[env.unwrapped.encode((20, 5))], [1.0, 0.25]))
+
+    def test_19walk(self):
+        self._run_test(gym.make('19Walk-v0'))
+
+
+    def _run_test(self, env):
+        S = env.observation_space.n
+        one_hot = feature_table(env, 'one_hot')
+        self.assertTrue((one_hot == np.eye(S)).all())
+
+        # Every state activates exactly one tile per tiling, and nearby states share tiles
+        tiles = feature_table(env, 'tile_coding', n_tilings=4, tiles_per_dim=3)
+        self.assertEqual(tiles.dtype, np.float32)
+        self.assertTrue((tiles.sum(axis=1) == 4).all())
+        self.assertFalse(tiles.flags.writeable)
+
+        # Tables are cached and shared between instances
+        other = gym.make(env.spec.id)
+        self.assertIs(feature_table(other, 'tile_coding', tiles_per_dim=3, n_tilings=4), tiles)
+
+        # The wrapper returns row views of the table
+        wrapped = FeatureObservation(env, 'tile_coding', n_tilings=4, tiles_per_dim=3)
+        obs, _ = wrapped.reset(seed=0)
+        self.assertTrue(wrapped.observation_space.contains(obs))
+        self.assertTrue(np.shares_memory(obs, tiles))
+        for _ in range(10):
+            next_obs = wrapped.step(wrapped.action_space.sample())[0]
+            self.assertEqual(next_obs.shape, (tiles.shape[1],))
+            self.assertTrue((next_obs == tiles[wrapped.unwrapped.encode(
+                wrapped.unwrapped.state)]).all())
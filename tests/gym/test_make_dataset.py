@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.make_dataset import behavior_policy, load_dataset, make_dataset
+
+
+class TestMakeDataset(unittest.TestCase):
+    def test_cliff_walk(self):
+        self._run_test('CliffWalk-v0', policy='uniform')
+
+    def test_jacks_car_rental(self):
+        self._run_test('JacksCarRental-v0', policy='uniform')
+
+    def test_qtable(self):
+        with tempfile.NamedTemporaryFile(suffix='.npy') as f:
+            Q = np.zeros((37, 4))
+            Q[:, 1] = 1.0
+            np.save(f.name, Q)
+            probs = behavior_policy('CliffWalk-v0', 'qtable:' + f.name, epsilon=0.2)
+            self.assertTrue(np.allclose(probs[:, 1], 0.85))
+            self._run_test('CliffWalk-v0', policy='qtable:' + f.name)
+
+
+    def _run_test(self, env_id, policy):
+        n_transitions = 5003
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            make_dataset(env_id, n_transitions, a, policy, n_workers=2, seed=1)
+            make_dataset(env_id, n_transitions, b, policy, n_workers=2, seed=1)
+            info, shards = load_dataset(a)
+            self.assertEqual(info['env_id'], env_id)
+            self.assertEqual(len(shards), 2)
+            self.assertEqual(sum(len(shard) for shard in shards), n_transitions)
+
+            # Shards use independent random streams, and generation is reproducible
+            arrays = [shard.arrays() for shard in shards]
+            self.assertFalse((arrays[0]['actions'][:2501] == arrays[1]['actions']).all())
+            _, other = load_dataset(b)
+            for shard, other_shard in zip(arrays, other):
+                for name, array in shard.items():
+                    self.assertTrue((array == other_shard.arrays()[name]).all())
+
+            for shard in arrays:
+                self.assertFalse((shard['terminated'] & shard['truncated']).any())
+
+    def test_time_limit(self):
+        # With one episode at a time, Jack's Car Rental is truncated every 100 steps
+        with tempfile.TemporaryDirectory() as path:
+            make_dataset('JacksCarRental-v0', 1000, path, n_workers=1, batch_size=1)
+            _, (shard,) = load_dataset(path)
+            arrays = shard.arrays()
+            self.assertFalse(arrays['terminated'].any())
+            self.assertTrue((np.flatnonzero(arrays['truncated']) == np.arange(99, 1000, 100)).all())
+            # Consecutive transitions connect within an episode
+            continuing = ~arrays['truncated'][:-1]
+            self.assertTrue((arrays['next_states'][:-1] == arrays['states'][1:])[continuing].all())
+
+    def test_fewer_transitions_than_workers(self):
+        with tempfile.TemporaryDirectory() as path:
+            make_dataset('CliffWalk-v0', 3, path, n_workers=4, format='memmap')
+            info, shards = load_dataset(path)
+            self.assertEqual(info['shards'], ['shard_000', 'shard_001', 'shard_002'])
+            self.assertEqual([len(shard) for shard in shards], [1, 1, 1])
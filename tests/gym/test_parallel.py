@@ -0,0 +1,34 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics import dynamic_programming, parallel
+
+
+class TestParallel(unittest.TestCase):
+    def test_cliff_walk(self):
+        self._run_test('CliffWalk-v0', discount=0.9)
+
+    def test_four_rooms(self):
+        self._run_test('FourRooms-v0', discount=0.95)
+
+    def test_windy_gridworld_kings_stochastic(self):
+        self._run_test('WindyGridworldKingsStochastic-v0', discount=0.9)
+
+
+    def _run_test(self, env_id, discount):
+        env = gym.make(env_id)
+        precision = 1e-9
+        V = dynamic_programming.value_iteration(env, discount, precision)
+        policy = dynamic_programming.policy_iteration(env, discount, precision)
+        V_policy = dynamic_programming.policy_evaluation(env, discount, policy, precision)
+
+        for asynchronous in [False, True]:
+            kwargs = dict(n_workers=2, block_size=16, asynchronous=asynchronous)
+            self.assertTrue(np.allclose(
+                parallel.value_iteration(env, discount, precision, **kwargs), V))
+            self.assertTrue(np.allclose(
+                parallel.policy_evaluation(env, discount, policy, precision, **kwargs), V_policy))
@@ -0,0 +1,60 @@
+from concurrent.futures import ProcessPoolExecutor
+import pickle
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+
+
+def _rollout(env, actions):
+    return [env.step(a)[:3] for a in actions]
+
+
+class TestPickle(unittest.TestCase):
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0')
+
+    def test_jacks_car_rental(self):
+        self._run_test('JacksCarRental-v0')
+
+    def test_windy_gridworld_kings_stochastic(self):
+        self._run_test('WindyGridworldKingsStochastic-v0')
+
+    def test_unseeded(self):
+        env = gym_classics.make_unwrapped('CliffWalk-v0')
+        env = pickle.loads(pickle.dumps(env))
+        self.assertIsNone(env._np_random)
+        env.reset()
+
+    def test_process_pool(self):
+        env = gym.make('JacksCarRental-v0').unwrapped
+        env.reset(seed=0)
+        actions = np.random.default_rng(0).integers(env.action_space.n, size=20)
+        with ProcessPoolExecutor(2) as executor:
+            trajectory = executor.submit(_rollout, env, actions).result()
+        self.assertEqual(trajectory, _rollout(env, actions))
+
+
+    def _run_test(self, env_id):
+        env = gym.make(env_id)
+        env.reset(seed=0)
+        env.unwrapped.compile_model()
+
+        # Only the constructor arguments and the state are serialized
+        data = pickle.dumps(env.unwrapped)
+        self.assertLess(len(data), 2048)
+        copy = pickle.loads(data)
+        self.assertIs(copy._structures, env.unwrapped._structures)
+        self.assertEqual(copy.spec, env.unwrapped.spec)
+
+        # The unpickled environment continues exactly like the original
+        actions = np.random.default_rng(0).integers(env.action_space.n, size=20)
+        self.assertEqual(copy.action_space.sample(), env.action_space.sample())
+        self.assertEqual(_rollout(copy, actions), _rollout(env.unwrapped, actions))
+
+        # Wrapped environments are pickled the same way
+        self.assertEqual(_rollout(pickle.loads(pickle.dumps(env)), actions),
+                         _rollout(env, actions))
@@ -0,0 +1,107 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.dynamic_programming import policy_evaluation
+from gym_classics.prediction import (generate_episodes, n_step_td, td_lambda, td_zero,
+                                     true_values)
+from gym_classics.rollouts import DEFAULT_MAX_STEPS
+
+
+class TestPrediction(unittest.TestCase):
+    def test_walk5(self):
+        self._run_test('5Walk-v0', discount=1.0, max_steps=None)
+
+    def test_walk19_truncated(self):
+        self._run_test('19Walk-v0', discount=0.9, max_steps=20)
+
+    def test_walk19_myopic(self):
+        self._run_test('19Walk-v0', discount=0.0, max_steps=None)
+
+    def test_non_terminating_policy(self):
+        # Moving down from the start cell (bottom-left) never reaches a terminal state
+        env = gym.make('CliffWalk-v0')
+        policy = np.zeros((env.observation_space.n, env.action_space.n))
+        policy[:, 2] = 1.0
+        episodes = generate_episodes(env, n_runs=1, n_episodes=2, policy=policy, rng=0)
+        self.assertTrue((episodes.lengths == DEFAULT_MAX_STEPS).all())
+        self.assertFalse(episodes.terminated.any())
+
+    def test_true_values(self):
+        env = gym.make('5Walk-v0')
+        self.assertTrue(np.allclose(true_values(env), np.arange(1, 6) / 6.0))
+        env = gym.make('ClassicGridworld-v0')
+        uniform = np.full((env.observation_space.n, env.action_space.n), 0.25)
+        self.assertTrue(np.allclose(true_values(env, 0.9),
+                                    policy_evaluation(env, 0.9, uniform, precision=1e-12)))
+
+
+    def _run_test(self, env_id, discount, max_steps):
+        env = gym.make(env_id)
+        V_true = true_values(env, discount)
+        episodes = generate_episodes(env, n_runs=3, n_episodes=4, rng=0, max_steps=max_steps)
+        self.assertEqual(episodes.lengths.shape, (3, 4))
+        if max_steps is None:
+            self.assertTrue(episodes.terminated.all())
+        else:
+            self.assertTrue((episodes.lengths <= max_steps).all())
+
+        alphas = np.asarray([0.1, 0.3])[:, None]
+        kwargs = dict(discount=discount, initial_values=0.5, V_true=V_true)
+
+        # Special cases coincide with TD(0)
+        V_td0, errors = td_zero(episodes, alphas[:, 0], **kwargs)
+        self.assertEqual(V_td0.shape, (2, 3, env.observation_space.n))
+        self.assertEqual(errors.shape, (2, 3, 4))
+        self.assertTrue(np.allclose(n_step_td(episodes, alphas[:, 0], 1, **kwargs).values, V_td0))
+        self.assertTrue(np.allclose(td_lambda(episodes, alphas[:, 0], 0.0, **kwargs).values, V_td0))
+
+        # The batched learners match straightforward implementations
+        ns, lams = [2, 3, 100], [0.5, 0.9, 1.0]
+        V_n = n_step_td(episodes, alphas, ns, **kwargs).values
+        V_lam = td_lambda(episodes, alphas, lams, **kwargs).values
+        self.assertEqual(V_n.shape, (2, 3, 3, env.observation_space.n))
+        for i, alpha in enumerate(alphas[:, 0]):
+            for j in range(3):
+                for r in range(3):
+                    self.assertTrue(np.allclose(
+                        V_n[i, j, r], _n_step_reference(episodes, r, alpha, ns[j], discount)))
+                    self.assertTrue(np.allclose(
+                        V_lam[i, j, r], _td_lambda_reference(episodes, r, alpha, lams[j], discount)))
+
+
+def _episode(episodes, r, e):
+    L = episodes.lengths[r, e]
+    return episodes.states[r, e, :L + 1], episodes.rewards[r, e, :L], episodes.terminated[r, e]
+
+
+def _n_step_reference(episodes, r, alpha, n, discount):
+    V = np.full(episodes.n_states, 0.5)
+    for e in range(episodes.lengths.shape[1]):
+        states, rewards, terminated = _episode(episodes, r, e)
+        L = len(rewards)
+        for tau in range(L):
+            end = min(tau + n, L)
+            G = sum(discount**(i - tau) * rewards[i] for i in range(tau, end))
+            if end < L or not terminated:
+                G += discount**(end - tau) * V[states[end]]
+            V[states[tau]] += alpha * (G - V[states[tau]])
+    return V
+
+
+def _td_lambda_reference(episodes, r, alpha, lam, discount):
+    V = np.full(episodes.n_states, 0.5)
+    for e in range(episodes.lengths.shape[1]):
+        states, rewards, terminated = _episode(episodes, r, e)
+        z = np.zeros_like(V)
+        for t in range(len(rewards)):
+            last = terminated and t == len(rewards) - 1
+            target = rewards[t] + (0.0 if last else discount * V[states[t + 1]])
+            delta = target - V[states[t]]
+            z *= discount * lam
+            z[states[t]] += 1.0
+            V += alpha * delta * z
+    return V
@@ -0,0 +1,59 @@
+import json
+import unittest
+
+import gym
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.envs.abstract.base_env import BaseEnv
+from gym_classics.profiling import Profiler
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        # Start with empty model caches
+        BaseEnv.clear_shared_structures()
+
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0')
+
+    def test_jacks_car_rental(self):
+        self._run_test('JacksCarRental-v0')
+
+    def test_shared_profiler(self):
+        profiler = Profiler()
+        envs = [gym.make('CliffWalk-v0').unwrapped for _ in range(2)]
+        for env in envs:
+            self.assertIs(env.enable_profiling(profiler), profiler)
+            env.reset(seed=0)
+        self.assertEqual(profiler.snapshot()['timings']['reset']['calls'], 2)
+
+
+    def _run_test(self, env_id):
+        env = gym.make(env_id).unwrapped
+        self.assertIsNone(env.profiler)
+        profiler = env.enable_profiling()
+        self.assertIs(env.profiler, profiler)
+
+        env.reset(seed=0)
+        for t in range(10):
+            env.step(env.action_space.sample())
+        env.model(0, 0)
+        env.model(0, 0)
+
+        snapshot = profiler.snapshot()
+        json.dumps(snapshot)  # Must be serializable
+        timings = snapshot['timings']
+        self.assertEqual(timings['reset']['calls'], 1)
+        self.assertEqual(timings['step']['calls'], 10)
+        self.assertEqual(timings['model']['calls'], 2)
+        self.assertEqual(sum(count for _, count in timings['step']['histogram']), 10)
+        self.assertGreaterEqual(timings['step']['max_sec'], timings['step']['mean_sec'])
+        self.assertEqual(snapshot['counters'], {'model_cache_misses': 1, 'model_cache_hits': 1})
+
+        # Disabling restores the original methods; the statistics are kept
+        self.assertIs(env.disable_profiling(), profiler)
+        self.assertIsNone(env.profiler)
+        self.assertNotIn('step', vars(env))
+        env.step(env.action_space.sample())
+        self.assertEqual(profiler.snapshot()['timings']['step']['calls'], 10)
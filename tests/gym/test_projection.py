@@ -0,0 +1,42 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.utils import format_grid, grid_projection
+
+
+class TestGridProjection(unittest.TestCase):
+    def test_cliff_walk(self):
+        self._run_test('CliffWalk-v0')
+
+    def test_four_rooms(self):
+        self._run_test('FourRooms-v0')
+
+    def test_jacks_car_rental_transposed(self):
+        env = gym.make('JacksCarRental-v0')
+        env.dims = (21, 21)
+        V = np.arange(env.observation_space.n, dtype=np.float64)
+        grid = grid_projection(env, V, transpose=True)
+        # State (a, b) is drawn at column b, row a (counted from the bottom)
+        self.assertEqual(grid[20 - 3, 7], V[env.unwrapped.encode((3, 7))])
+
+    def test_format_grid(self):
+        grid = np.asarray([[1.0, np.nan], [-12.5, 0.0]])
+        self.assertEqual(format_grid(grid, decimals=1, separator=' '),
+                         ' +1.0       \n-12.5  +0.0 ')
+
+    def _run_test(self, env_id):
+        env = gym.make(env_id)
+        V = np.random.default_rng(0).random(env.observation_space.n)
+        grid = grid_projection(env.unwrapped, V)
+        W, H = env.unwrapped.dims
+        self.assertEqual(grid.shape, (H, W))
+        for x in range(W):
+            for y in range(H):
+                if env.unwrapped.is_reachable((x, y)):
+                    self.assertEqual(grid[H - 1 - y, x], V[env.unwrapped.encode((x, y))])
+                else:
+                    self.assertTrue(np.isnan(grid[H - 1 - y, x]))
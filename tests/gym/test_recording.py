@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.recording import TrajectoryRecorder, load_trajectories
+
+
+class TestRecording(unittest.TestCase):
+    def test_npy(self):
+        self._run_test(format='npy', chunk_size=64)
+
+    def test_npz(self):
+        self._run_test(format='npz', chunk_size=64, compress=True)
+
+    def test_memmap(self):
+        self._run_test(format='memmap', capacity=1000)
+
+    def test_memmap_full(self):
+        with tempfile.TemporaryDirectory() as path:
+            with TrajectoryRecorder(path, format='memmap', capacity=4) as recorder:
+                with self.assertRaises(ValueError):
+                    recorder.add_batch(np.arange(5), 0, 0.0, 0, False)
+
+
+    def _run_test(self, **kwargs):
+        env = gym.make('WindyGridworldKingsStochastic-v0')
+        with tempfile.TemporaryDirectory() as path:
+            # Record some steps one at a time, then a batch
+            expected = []
+            with TrajectoryRecorder(path, metadata={'env_id': 'test'}, **kwargs) as recorder:
+                state, _ = env.reset(seed=0)
+                for t in range(100):
+                    action = env.action_space.sample()
+                    next_state, reward, terminated, truncated, _ = env.step(action)
+                    recorder.add(state, action, reward, next_state, terminated, truncated)
+                    expected.append((state, action, reward, next_state, terminated, truncated))
+                    state = next_state if not (terminated or truncated) else env.reset()[0]
+
+                batch = np.arange(150)
+                recorder.add_batch(batch, batch % 8, -1.0, batch + 1, batch % 10 == 0)
+                expected.extend((s, s % 8, -1.0, s + 1, s % 10 == 0, False) for s in batch)
+                self.assertEqual(len(recorder), 250)
+
+            data = load_trajectories(path)
+            self.assertEqual(len(data), 250)
+            self.assertEqual(data.metadata, {'env_id': 'test'})
+            arrays = data.arrays()
+            self.assertEqual(arrays['states'].dtype, np.int32)
+            self.assertEqual(arrays['rewards'].dtype, np.float32)
+            self.assertEqual(arrays['terminated'].dtype, np.bool_)
+            columns = list(zip(*expected))
+            for name, column in zip(['states', 'actions', 'rewards', 'next_states',
+                                     'terminated', 'truncated'], columns):
+                self.assertTrue((arrays[name] == np.asarray(column)).all(), name)
+
+            if kwargs['format'] != 'npz':
+                for chunk in data.chunks():
+                    self.assertIsInstance(chunk['states'].base, np.memmap)
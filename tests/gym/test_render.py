@@ -0,0 +1,60 @@
+import unittest
+import warnings
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+
+
+class TestRender(unittest.TestCase):
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0')
+
+    def test_cliff_walk(self):
+        self._run_test('CliffWalk-v0')
+
+    def test_windy_gridworld_kings(self):
+        self._run_test('WindyGridworldKings-v0')
+
+    def test_no_render_mode(self):
+        env = gym.make('CliffWalk-v0').unwrapped
+        env.reset(seed=0)
+        with warnings.catch_warnings(record=True):
+            self.assertIsNone(env.render())
+
+
+    def _run_test(self, env_id):
+        env = gym.make(env_id, render_mode='rgb_array')
+        unwrapped = env.unwrapped
+        W, H = unwrapped.dims
+        c = unwrapped.cell_size
+
+        # Rendering does not change the shared structures
+        self.assertIs(unwrapped._structures, gym.make(env_id).unwrapped._structures)
+
+        state, _ = env.reset(seed=0)
+        for _ in range(20):
+            frame = env.render()
+            self.assertEqual(frame.shape, (H * c, W * c, 3))
+            self.assertEqual(frame.dtype, np.uint8)
+
+            # Only the agent's cell differs from the static layout
+            x, y = unwrapped.decode(state)
+            diff = np.any(frame != unwrapped._rasterize_layout(), axis=-1)
+            rows, cols = np.nonzero(diff)
+            self.assertTrue(((rows // c) == H - 1 - y).all())
+            self.assertTrue(((cols // c) == x).all())
+            self.assertTrue(diff.any())
+
+            state, _, terminated, truncated, _ = env.step(env.action_space.sample())
+            if terminated or truncated:
+                state, _ = env.reset()
+
+        # The batched renderer matches the single-frame renderer
+        states = np.arange(env.observation_space.n)
+        frames = unwrapped.render_batch(states)
+        for s in [0, len(states) - 1]:
+            unwrapped.state = unwrapped.decode(s)
+            self.assertTrue((frames[s] == unwrapped.render()).all())
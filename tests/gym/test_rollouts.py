@@ -0,0 +1,72 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.dynamic_programming import policy_evaluation, policy_iteration
+from gym_classics.rollouts import DEFAULT_MAX_STEPS, rollouts
+from gym_classics.utils import epsilon_greedy
+
+
+class TestRollouts(unittest.TestCase):
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0', discount=0.9)
+
+    def test_jacks_car_rental(self):
+        self._run_test('JacksCarRental-v0', discount=0.9)
+
+    def test_windy_gridworld_kings_stochastic(self):
+        self._run_test('WindyGridworldKingsStochastic-v0', discount=0.9)
+
+    def test_time_limit(self):
+        env = gym.make('JacksCarRental-v0')
+        results = rollouts(env, np.zeros(441, dtype=np.int64), 50, rng=0)
+        self.assertTrue((results.lengths == 100).all())
+        self.assertTrue(results.truncated.all())
+
+        # The registered limit also applies without the TimeLimit wrapper
+        for unwrapped in [env.unwrapped, gym_classics.make_unwrapped('JacksCarRental-v0')]:
+            results = rollouts(unwrapped, np.zeros(441, dtype=np.int64), 5, rng=0)
+            self.assertTrue((results.lengths == 100).all())
+
+        results = rollouts(env, np.zeros(441, dtype=np.int64), 50, max_steps=7, rng=0)
+        self.assertTrue((results.lengths == 7).all())
+
+    def test_non_terminating_policy(self):
+        # Moving down from the start cell (bottom-left) never reaches a terminal state
+        env = gym.make('CliffWalk-v0')
+        policy = np.full(env.observation_space.n, 2)
+        results = rollouts(env, policy, 10, rng=0)
+        self.assertTrue((results.lengths == DEFAULT_MAX_STEPS).all())
+        self.assertTrue(results.truncated.all())
+
+        results = rollouts(env, policy, 10, max_steps=20, rng=0)
+        self.assertTrue((results.lengths == 20).all())
+        self.assertTrue(results.truncated.all())
+
+
+    def _run_test(self, env_id, discount):
+        env = gym.make(env_id)
+        n_episodes = 5000
+        start = env.unwrapped.encode(env.unwrapped._starts[0])
+
+        # Deterministic and stochastic policies agree with their exact values
+        policy = policy_iteration(env, discount)
+        stochastic_policy = epsilon_greedy(np.eye(env.action_space.n)[policy], 0.2)
+        for pi in [policy, stochastic_policy]:
+            V = policy_evaluation(env, discount, pi, precision=1e-9)
+            results = rollouts(env, pi, n_episodes, discount, rng=0, count_visits=True)
+            self.assertEqual(results.returns.shape, (n_episodes,))
+            self.assertEqual(results.visits.sum(), results.lengths.sum())
+            self.assertEqual(results.truncated.all(), env.spec.max_episode_steps is not None)
+            stderr = results.returns.std() / np.sqrt(n_episodes)
+            self.assertLess(abs(results.returns.mean() - V[start]), 5.0 * stderr + 1e-9)
+
+        # Seeded rollouts are reproducible
+        a = rollouts(env, policy, 10, discount, rng=123)
+        b = rollouts(env, policy, 10, discount, rng=123)
+        self.assertTrue((a.returns == b.returns).all())
+        self.assertTrue((a.lengths == b.lengths).all())
+        self.assertIsNone(a.visits)
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.dynamic_programming import value_iteration
+from gym_classics.solve import (optimal_policy, optimal_q_values, optimal_values,
+                                solution_path, solve)
+
+
+class TestSolve(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_cliff_walk(self):
+        self._run_test('CliffWalk-v0', discount=0.9)
+
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0', discount=1.0)
+
+    def test_non_terminating_env(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            paths = solve('JacksCarRental-v0', [0.9, 1.0], self.cache_dir)
+        self.assertEqual(paths, [solution_path('JacksCarRental-v0', 0.9, self.cache_dir)])
+        with self.assertRaises(ValueError), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            optimal_values('JacksCarRental-v0', 1.0, self.cache_dir)
+
+
+    def _run_test(self, env_id, discount):
+        # Solutions are computed on demand and cached
+        path = solution_path(env_id, discount, self.cache_dir)
+        self.assertFalse(os.path.exists(path))
+        V = optimal_values(env_id, discount, self.cache_dir)
+        self.assertTrue(os.path.exists(path))
+
+        env = gym.make(env_id)
+        self.assertTrue(np.allclose(V, value_iteration(env, discount, 1e-9), atol=1e-6))
+        Q = optimal_q_values(env_id, discount, self.cache_dir)
+        self.assertTrue(np.allclose(Q.max(axis=-1), V))
+        self.assertTrue((optimal_policy(env_id, discount, self.cache_dir) == Q.argmax(axis=-1)).all())
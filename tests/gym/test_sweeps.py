@@ -0,0 +1,75 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.dynamic_programming import (policy_evaluation_sweeps, policy_iteration,
+                                              policy_iteration_steps, value_iteration,
+                                              value_iteration_sweeps)
+
+
+class TestSweeps(unittest.TestCase):
+    def test_value_iteration(self):
+        env = gym.make('SparseGridworld-v0')
+        S, A = env.observation_space.n, env.action_space.n
+
+        history = list(value_iteration_sweeps(env, discount=0.95, precision=1e-6))
+        self.assertEqual([stats.iteration for stats in history], list(range(1, len(history) + 1)))
+        self.assertEqual(history[-1].backups, len(history) * S * A)
+        self.assertLessEqual(history[-1].residual, 1e-6)
+        self.assertGreater(history[-2].residual, 1e-6)
+        self.assertTrue(all(stats.span <= 2 * stats.residual for stats in history))
+        self.assertTrue((history[-1].values == value_iteration(env, 0.95, 1e-6)).all())
+
+        # Stop early with a callback
+        V = value_iteration(env, 0.95, 1e-6, callback=lambda stats: stats.iteration == 3)
+        self.assertTrue((V == history[2].values).all())
+
+        # An exhausted time budget stops after the first sweep
+        V = value_iteration(env, 0.95, 1e-6, time_budget=0.0)
+        self.assertTrue((V == history[0].values).all())
+
+    def test_policy_iteration(self):
+        env = gym.make('ClassicGridworld-v0')
+        discounts = np.asarray([0.5, 0.9])
+
+        history = list(policy_iteration_steps(env, discounts))
+        self.assertEqual(history[-1].residual.shape, (2,))
+        self.assertEqual(history[-1].policy_changes.shape, (2,))
+        self.assertTrue((history[-1].policy == policy_iteration(env, discounts)).all())
+
+        history = list(policy_evaluation_sweeps(env, 0.9, history[-1].policy[1]))
+        self.assertIsNone(history[-1].policy)
+        self.assertLessEqual(history[-1].residual, 1e-3)
+
+
+class TestAcceleratedValueIteration(unittest.TestCase):
+    def test_classic_gridworld(self):
+        self._run_test('ClassicGridworld-v0', discount=0.9)
+
+    def test_windy_gridworld_kings_no_op(self):
+        self._run_test('WindyGridworldKingsNoOp-v0', discount=0.9)
+
+    def test_windy_gridworld_kings_stochastic(self):
+        self._run_test('WindyGridworldKingsStochastic-v0', discount=0.95)
+
+
+    def _run_test(self, env_id, discount):
+        env = gym.make(env_id)
+        V_star = value_iteration(env, discount, precision=1e-12)
+        baseline = list(value_iteration_sweeps(env, discount, precision=1e-4))
+
+        # Span stopping guarantees that the values are within the precision of V*
+        for action_elimination in [False, True]:
+            history = list(value_iteration_sweeps(env, discount, precision=1e-4, stopping='span',
+                                                  action_elimination=action_elimination))
+            self.assertLessEqual(np.abs(history[-1].values - V_star).max(), 1e-4)
+
+        # Action elimination must not change the values, only reduce the work
+        history = list(value_iteration_sweeps(env, discount, precision=1e-4,
+                                              action_elimination=True))
+        self.assertEqual(len(history), len(baseline))
+        self.assertTrue(np.allclose(history[-1].values, baseline[-1].values))
+        self.assertLess(history[-1].backups, baseline[-1].backups)
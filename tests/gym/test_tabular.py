@@ -0,0 +1,55 @@
+import unittest
+
+import gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gym')
+from gym_classics.dynamic_programming import policy_evaluation, q_values, value_iteration
+from gym_classics.tabular import expected_sarsa, q_learning, sarsa
+from gym_classics.utils import epsilon_greedy
+
+
+class TestTabularLearning(unittest.TestCase):
+    def test_q_learning(self):
+        self._run_test(q_learning, on_policy=False)
+
+    def test_sarsa(self):
+        self._run_test(sarsa, on_policy=True)
+
+    def test_expected_sarsa(self):
+        self._run_test(expected_sarsa, on_policy=True)
+
+    def test_time_limit(self):
+        # Episodes restart after the registered time limit, with or without wrappers
+        env = gym.make('JacksCarRental-v0')
+        Q = q_learning(env, 2, 300, 0.9, 0.1, 0.1, rng=0)
+        for unwrapped in [env.unwrapped, gym_classics.make_unwrapped('JacksCarRental-v0')]:
+            self.assertTrue((q_learning(unwrapped, 2, 300, 0.9, 0.1, 0.1, rng=0) == Q).all())
+
+
+    def _run_test(self, algorithm, on_policy):
+        env = gym.make('ClassicGridworld-v0')
+        discount, epsilon = 0.9, 0.5
+        S, A = env.observation_space.n, env.action_space.n
+
+        # The first run does not learn at all
+        learning_rates = np.asarray([0.0, 0.05, 0.05, 0.05])
+        Q = algorithm(env, 4, 20000, discount, learning_rates, epsilon, rng=0)
+        self.assertEqual(Q.shape, (4, S, A))
+        self.assertTrue((Q[0] == 0.0).all())
+
+        # The learning runs approach Q* (off-policy) or Q of the behavior policy
+        if on_policy:
+            # Compare against the epsilon-greedy policy w.r.t. the learned values
+            policy = epsilon_greedy(Q[1:], epsilon)
+            V = policy_evaluation(env, discount, policy, precision=1e-9)
+        else:
+            V = value_iteration(env, discount, precision=1e-9)
+        Q_target = q_values(env, discount, V)
+        rms = np.sqrt(np.mean((Q[1:] - Q_target)**2, axis=(-2, -1)))
+        self.assertTrue((rms < 0.2).all(), rms)
+
+        # Seeded runs are reproducible
+        self.assertTrue((Q == algorithm(env, 4, 20000, discount, learning_rates,
+                                        epsilon, rng=0)).all())
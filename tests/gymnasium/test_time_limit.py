@@ -0,0 +1,31 @@
+import unittest
+
+import gymnasium as gym
+import numpy as np
+
+import gym_classics
+gym_classics.register('gymnasium')
+from gym_classics.dynamic_programming import backward_induction
+from gym_classics.rollouts import rollouts
+from gym_classics.tabular import q_learning
+
+
+class TestTimeLimit(unittest.TestCase):
+    def test_rollouts(self):
+        # Gymnasium clears the limit in the spec of the unwrapped environment
+        env = gym.make('JacksCarRental-v0')
+        policy = np.zeros(env.observation_space.n, dtype=np.int64)
+        for env in [env, env.unwrapped, gym_classics.make_unwrapped('JacksCarRental-v0')]:
+            results = rollouts(env, policy, 5, rng=0)
+            self.assertTrue((results.lengths == 100).all())
+            self.assertTrue(results.truncated.all())
+
+    def test_backward_induction(self):
+        V, policy = backward_induction(gym.make('JacksCarRental-v0'), discount=0.9)
+        self.assertEqual(V.shape, (101, 441))
+        self.assertEqual(policy.shape, (100, 441))
+
+    def test_tabular(self):
+        env = gym.make('JacksCarRental-v0')
+        Q = q_learning(env, 2, 300, 0.9, 0.1, 0.1, rng=0)
+        self.assertTrue((q_learning(env.unwrapped, 2, 300, 0.9, 0.1, 0.1, rng=0) == Q).all())